@@ -1,72 +1,89 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "utils"))
+from database import RentalDatabase, ReadPool, search_listings, count_listings
+
+DB_PATH = os.path.join('data', 'rentals.db')
+PAGE_SIZE = 200  # listings per results page
 
 # Page config
 st.set_page_config(page_title="Dublin House Search", page_icon="🏠", layout="wide")
 
-# Load data from SQLite database
-@st.cache_data
-def load_data():
-    db_path = os.path.join('data', 'rentals.db')
+# Read-only connections shared by every session; in WAL mode they never block a running scrape
+@st.cache_resource
+def get_read_pool():
+    # Opening the writer once applies schema upgrades and switches the file to WAL
+    RentalDatabase(DB_PATH).close()
+    return ReadPool(DB_PATH)
 
-    if not os.path.exists(db_path):
-        st.error(f"Database not found at {db_path}. Please run the scrapers first: `python utils/main.py`")
-        return pd.DataFrame()
+# Totals for the header and the rent slider, aggregated in SQLite
+@st.cache_data(ttl=60)
+def load_overview():
+    if not os.path.exists(DB_PATH):
+        st.error(f"Database not found at {DB_PATH}. Please run the scrapers first: `python utils/main.py`")
+        return None
 
-    # Load from SQLite database
     try:
-        conn = sqlite3.connect(db_path)
-        df = pd.read_sql_query('''
-            SELECT source, address, url, rent_eur, rent_period, original_rent,
-                   summary, beds, baths, furnished, scraped_at, updated_at
-            FROM rentals
-            ORDER BY updated_at DESC
-        ''', conn)
-        conn.close()
-
-        # Clean data
-        df['rent_eur'] = pd.to_numeric(df['rent_eur'], errors='coerce')
-        df['beds'] = pd.to_numeric(df['beds'], errors='coerce')
-        df['baths'] = pd.to_numeric(df['baths'], errors='coerce')
-
-        return df
+        with get_read_pool().connection() as conn:
+            row = conn.execute('''
+                SELECT COUNT(*) AS total,
+                       COUNT(DISTINCT COALESCE(canonical_id, id)) AS unique_total,
+                       COUNT(CASE WHEN rent_period = 'weekly' THEN 1 END) AS weekly_count,
+                       COUNT(CASE WHEN rent_period = 'monthly' THEN 1 END) AS monthly_count,
+                       COUNT(DISTINCT source) AS sources_count,
+                       MAX(rent_eur) AS max_rent
+                FROM rentals
+            ''').fetchone()
+        return dict(row)
     except Exception as e:
         st.error(f"Error loading database: {e}")
-        return pd.DataFrame()
+        return None
+
+# One page of matching listings; filtering, sorting and paging run on the database indexes
+@st.cache_data(ttl=60)
+def search_page(filters, after=None):
+    with get_read_pool().connection() as conn:
+        return search_listings(conn, limit=PAGE_SIZE, after=after, **dict(filters))
 
-df = load_data()
+# Total matches for the header, counted with the same filters as the pages
+@st.cache_data(ttl=60)
+def count_matches(filters):
+    with get_read_pool().connection() as conn:
+        return count_listings(conn, **dict(filters))
+
+overview = load_overview()
 
 # Title
 st.title("🏠 Dublin House Search")
 st.markdown("Search for rental properties in Dublin from multiple sources")
 
 # Show database info if data exists
-if len(df) > 0:
+if overview and overview['total'] > 0:
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Listings", len(df))
+        st.metric("Unique Listings", overview['unique_total'],
+                  help=f"{overview['total']} listings before merging the same flat across sources")
     with col2:
-        weekly_count = len(df[df['rent_period'] == 'weekly']) if 'rent_period' in df.columns else 0
-        st.metric("Weekly (Converted)", weekly_count)
+        st.metric("Weekly (Converted)", overview['weekly_count'])
     with col3:
-        monthly_count = len(df[df['rent_period'] == 'monthly']) if 'rent_period' in df.columns else 0
-        st.metric("Originally Monthly", monthly_count)
+        st.metric("Originally Monthly", overview['monthly_count'])
     with col4:
-        sources_count = df['source'].nunique()
-        st.metric("Data Sources", sources_count)
+        st.metric("Data Sources", overview['sources_count'])
     st.markdown("---")
 
 # Sidebar filters
 st.sidebar.header("Search Filters")
 
 # Price range
+rent_ceiling = int(overview['max_rent']) if overview and overview['max_rent'] else 5000
 min_rent, max_rent = st.sidebar.slider(
     "Rent Range (EUR/month)",
     min_value=0,
-    max_value=int(df['rent_eur'].max()) if df['rent_eur'].max() > 0 else 5000,
-    value=(0, int(df['rent_eur'].max()) if df['rent_eur'].max() > 0 else 5000)
+    max_value=rent_ceiling,
+    value=(0, rent_ceiling)
 )
 
 # Bedrooms
@@ -87,60 +104,70 @@ furnished_option = st.sidebar.selectbox(
     options=["Any", "Yes", "No", "Unknown"]
 )
 
-# Location search
-location_search = st.sidebar.text_input("Location/Address (keyword)")
+# The same flat listed on several sites shares a canonical id
+hide_duplicates = st.sidebar.checkbox("Hide cross-source duplicates", value=True)
+
+# Keyword search over address and summary (full-text index, words match as prefixes)
+location_search = st.sidebar.text_input("Location or keyword", help="e.g. \"rathmines\", \"dublin 8 studio\"")
 
 # Clear filters button
 if st.sidebar.button("Clear All Filters"):
     st.rerun()
 
-# Filter data
-filtered_df = df.copy()
-
-# Apply rent filter
-filtered_df = filtered_df[(filtered_df['rent_eur'] >= min_rent) & (filtered_df['rent_eur'] <= max_rent)]
-
-# Apply bedroom filter
-if beds_option != "Any":
-    if beds_option == "Studio":
-        filtered_df = filtered_df[filtered_df['summary'].str.contains("Studio", case=False, na=False)]
-    elif beds_option == "4+":
-        filtered_df = filtered_df[filtered_df['beds'] >= 4]
-    else:
-        filtered_df = filtered_df[filtered_df['beds'] == int(beds_option)]
-
-# Apply bathroom filter
-if baths_option != "Any":
-    if baths_option == "3+":
-        filtered_df = filtered_df[filtered_df['baths'] >= 3]
-    else:
-        filtered_df = filtered_df[filtered_df['baths'] == int(baths_option)]
-
-# Apply furnished filter
+# Sort order
+sort_option = st.sidebar.selectbox(
+    "Sort by",
+    options=["Rent: low to high", "Rent: high to low", "Recently updated"]
+)
+
+# Build the database query from the filters
+filters = {
+    'min_rent': min_rent,
+    'max_rent': max_rent,
+    'sort': {"Rent: low to high": 'rent_asc', "Rent: high to low": 'rent_desc',
+             "Recently updated": 'newest'}[sort_option],
+    'unique': hide_duplicates,
+}
+
+if beds_option == "Studio":
+    filters['summary_contains'] = "studio"
+elif beds_option == "4+":
+    filters['min_beds'] = 4
+elif beds_option != "Any":
+    filters['beds'] = int(beds_option)
+
+if baths_option == "3+":
+    filters['min_baths'] = 3
+elif baths_option != "Any":
+    filters['baths'] = int(baths_option)
+
 if furnished_option != "Any":
-    filtered_df = filtered_df[filtered_df['furnished'] == furnished_option]
+    filters['furnished'] = furnished_option
 
-# Apply location filter
 if location_search:
-    filtered_df = filtered_df[filtered_df['address'].str.contains(location_search, case=False, na=False)]
+    filters['keywords'] = location_search
+
+# Keyset pagination: remember the cursor of every page visited for these filters
+filters_key = tuple(sorted(filters.items()))
+if st.session_state.get('filters_key') != filters_key:
+    st.session_state['filters_key'] = filters_key
+    st.session_state['cursors'] = [None]
+
+results = search_page(filters_key, st.session_state['cursors'][-1]) if overview else {'rows': [], 'next': None}
+total_matches = count_matches(filters_key) if overview else 0
+filtered_df = pd.DataFrame(results['rows'])
+page_number = len(st.session_state['cursors'])
 
 # Display results
-st.subheader(f"Found {len(filtered_df)} properties")
+first = (page_number - 1) * PAGE_SIZE + 1
+st.subheader(f"Found {total_matches} properties (showing {first}-{first + len(filtered_df) - 1})"
+             if len(filtered_df) > 0 else "Found 0 properties")
 
 if len(filtered_df) > 0:
     # Display as table with clickable links
-    # Check if rent_period column exists (for database mode)
-    if 'rent_period' in filtered_df.columns:
-        display_df = filtered_df[['address', 'rent_eur', 'original_rent', 'beds', 'baths', 'furnished', 'summary', 'url']].copy()
-        display_df.columns = ['Address', 'Rent (EUR/month)', 'Original Rent', 'Beds', 'Baths', 'Furnished', 'Summary', 'URL']
-    else:
-        display_df = filtered_df[['address', 'rent_eur', 'beds', 'baths', 'furnished', 'summary', 'url']].copy()
-        display_df.columns = ['Address', 'Rent (EUR)', 'Beds', 'Baths', 'Furnished', 'Summary', 'URL']
-
-    # Sort by rent
-    display_df = display_df.sort_values(display_df.columns[1])  # Sort by rent column
-
-    # Display with pagination
+    display_df = filtered_df[['address', 'rent_eur', 'original_rent', 'beds', 'baths', 'furnished', 'summary', 'url']].copy()
+    display_df.columns = ['Address', 'Rent (EUR/month)', 'Original Rent', 'Beds', 'Baths', 'Furnished', 'Summary', 'URL']
+
     st.dataframe(
         display_df,
         use_container_width=True,
@@ -149,6 +176,16 @@ if len(filtered_df) > 0:
             "URL": st.column_config.LinkColumn("View Listing")
         }
     )
+
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        if page_number > 1 and st.button("← Previous page"):
+            st.session_state['cursors'].pop()
+            st.rerun()
+    with next_col:
+        if results['next'] is not None and st.button("Next page →"):
+            st.session_state['cursors'].append(results['next'])
+            st.rerun()
 else:
     st.info("No properties match your search criteria. Try adjusting the filters.")
 
@@ -0,0 +1,275 @@
+# base_scraper.py
+import re
+import yaml
+from typing import Iterator, List, Dict, Set, Optional, Tuple
+from bs4 import BeautifulSoup
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+from webdriver_manager.chrome import ChromeDriverManager
+from browser_profile import build_chrome_options, apply_browser_profile
+from http_fetcher import HttpFetcher
+from waits import wait_for_listings
+from page_parsing import make_soup
+from crawl_engine import CrawlEngine
+from incremental import make_tracker
+from checkpoint import CrawlProgress
+from crawl_metrics import CrawlMetrics
+
+
+class BaseScraper:
+    """
+    Setup, browser handling, page cache/archive plumbing and lifecycle shared by the house scrapers.
+
+    Subclasses set SOURCE, CONFIG_SECTION (their section of config.yaml) and
+    CARD_SELECTOR, and implement iter_pages() and _parse_page() (or parse_html()).
+    With parse_only=True only the config is loaded: enough for parse_html(),
+    without a crawl engine, metrics, HTTP session or parse pool.
+    """
+    SOURCE = None
+    CONFIG_SECTION = None
+    CARD_SELECTOR = None
+
+    def __init__(self, config_path: str = "D:/Live Labor-Housing Mismatch Index 2025 (Dublin)/config.yaml", driver_pool=None, crawl_engine=None, known_listings=None, page_cache=None, archive=None, checkpoint=None, metrics=None, parse_only=False):
+        self.config_path = config_path
+        self.config = self._load_config(config_path)
+        if parse_only:
+            return
+        self.driver_pool = driver_pool
+        # Per-host request budget replaces fixed sleeps between pages
+        self.engine = crawl_engine or CrawlEngine()
+        self.engine.configure_site(self.config)
+        self.driver = None
+        self.wait = None
+        # Resumes from a saved checkpoint (next page, failed pages, URLs already saved) when given
+        self.progress = CrawlProgress(checkpoint)
+        self.seen_urls: Set[str] = self.progress.seen_urls
+        self.page_cache = page_cache
+        self.archive = archive  # optional PageArchive recording raw pages for replay
+        self.metrics = metrics or CrawlMetrics()  # per-page timings, shared across scrapers by utils/main.py
+        # Set when known_listings (url -> fingerprint from the database) is passed in
+        self.incremental = make_tracker(self.config, known_listings)
+        self.http = None
+        # Set once raw HTML has carried cards: the site renders them server-side
+        self._server_rendered = False
+        if self.config["scraper"].get("fetch_mode", "selenium") == "http":
+            self.http = HttpFetcher(timeout=self.config["scraper"]["timeout"], cache=self.page_cache)
+
+    def _load_config(self, path: str) -> dict:
+        with open(path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f)[self.CONFIG_SECTION]
+
+    def _init_driver(self):
+        options = build_chrome_options(self.config["scraper"]["headless"], self._browser_profile())
+
+        service = Service(ChromeDriverManager().install())
+        self.driver = webdriver.Chrome(service=service, options=options)
+        self.wait = WebDriverWait(self.driver, self.config["scraper"]["timeout"])
+        self._apply_profile(self.driver)
+
+    def _browser_profile(self) -> str:
+        return self.config["scraper"].get("browser_profile", "default")
+
+    def _apply_profile(self, driver):
+        apply_browser_profile(driver, self._browser_profile(), self.config["scraper"].get("blocked_urls"))
+
+    def _acquire_driver(self) -> webdriver.Chrome:
+        """Browser for one page load: leased from the shared pool, or started locally on first use"""
+        if self.driver is None:
+            if self.driver_pool:
+                self.driver = self.driver_pool.acquire()
+                self._apply_profile(self.driver)
+                self.wait = WebDriverWait(self.driver, self.config["scraper"]["timeout"])
+            else:
+                self._init_driver()
+        return self.driver
+
+    def _return_driver(self, driver):
+        """Hand a leased browser back to the pool after each page"""
+        if self.driver_pool and self.driver is not None:
+            self.driver_pool.release(self.driver)
+            self.driver = None
+
+    def _search_path(self) -> str:
+        path = self.config["website"]["search_path"]
+        if self.incremental:
+            # Newest-first ordering, where the site has one, lets incremental runs stop early
+            path = (self.config.get("incremental") or {}).get("search_path", path)
+        return path
+
+    def _get_page_url(self, page: int) -> str:
+        # Replace ?page=1 with ?page={page}
+        path = re.sub(r'([?&])page=\d+', rf'\g<1>page={page}', self._search_path())
+        return self.config["website"]["base_url"] + path
+
+    def _fetch_soup(self, url: str) -> Optional[BeautifulSoup]:
+        """
+        Fetch page over plain HTTP. Returns None if the request failed or the
+        cards need JavaScript.
+
+        Once an earlier page carried its cards in the raw HTML, a page without
+        any is an empty results page (the end of a crawl) and is returned as is
+        instead of being rendered again in the browser.
+        """
+        with self.metrics.timer("navigate"):
+            html, from_cache = self.http.fetch(url)
+        if not html:
+            return None
+        self.metrics.note(cached=from_cache, bytes=len(html.encode("utf-8")))
+        with self.metrics.timer("parse"):
+            soup = make_soup(html)
+        if soup.select_one(self.CARD_SELECTOR):
+            self._server_rendered = True
+        elif not self._server_rendered:
+            print("[HTTP] No listings in raw HTML, falling back to browser")
+            return None
+        self._record(url, html)
+        return soup
+
+    def _wait_for_cards(self, driver):
+        """Block until the listing cards have rendered (raises TimeoutException if none appear)"""
+        wait_for_listings(driver, self.CARD_SELECTOR,
+                          timeout=self.config["scraper"]["timeout"],
+                          max_settle=self.config["scraper"]["delay"])
+
+    def _render_page(self, page: int, url: str) -> Optional[str]:
+        """
+        Load page in the browser and return its rendered HTML, or None if
+        navigation timed out. A page that loads but shows no cards is returned
+        too: callers treat it as an empty results page.
+        """
+        cached = self._cached_page(url)
+        if cached is not None:
+            return cached
+
+        # Waiting for a free browser counts as queueing
+        with self.metrics.timer("queue_wait"):
+            driver = self._acquire_driver()
+        try:
+            with self.metrics.timer("navigate"):
+                driver.get(url)
+            with self.metrics.timer("wait"):
+                try:
+                    self._wait_for_cards(driver)
+                except TimeoutException:
+                    print(f"[PAGE {page}] No listings rendered")
+                html = driver.page_source
+            self.metrics.note(bytes=len(html.encode("utf-8")))
+            if self.page_cache:
+                self.page_cache.put(url, html)
+            self._record(url, html)
+            return html
+        except TimeoutException:
+            return None
+        finally:
+            self._return_driver(driver)
+
+    def _load_search_page(self, page: int, url: str,
+                          empty_is_failure: bool = False) -> Optional[Tuple[BeautifulSoup, int, List[Dict]]]:
+        """
+        Fetch and parse one search page, over HTTP when configured and in the
+        browser otherwise. Returns (soup, cards found, listings), or None if
+        the page failed.
+        """
+        record = self.metrics.start(self.SOURCE, page, url, queue_wait=self.engine.take_queue_wait())
+        try:
+            soup = self._fetch_soup(url) if self.http else None
+            if soup is None:
+                html = self._render_page(page, url)
+                if html is None:
+                    record["failure"] = "timeout"
+                    return None
+                with self.metrics.timer("parse"):
+                    soup = make_soup(html)
+
+            # One in-memory parse per page instead of WebDriver calls per card
+            with self.metrics.timer("parse"):
+                cards = soup.select(self.CARD_SELECTOR)
+                listings = self._parse_page(cards)
+            record.update(cards=len(cards), parsed=len(listings))
+            if not cards and empty_is_failure:
+                record["failure"] = "no listings"
+            return soup, len(cards), listings
+        except Exception as e:
+            record["failure"] = type(e).__name__
+            raise
+        finally:
+            self.metrics.finish(record)
+
+    def _cached_page(self, url: str) -> Optional[str]:
+        """Fresh HTML for `url` from the page cache, recorded like a live load. None on a miss."""
+        # In http mode the fetcher already consulted the cache for this URL
+        if not self.page_cache or self.http:
+            return None
+        cached = self.page_cache.get(url)
+        if not cached or not cached["fresh"]:
+            return None
+        self.metrics.note(cached=True, bytes=len(cached["body"].encode("utf-8")))
+        self._record(url, cached["body"])
+        return cached["body"]
+
+    def _record(self, url: str, html: str):
+        if self.archive:
+            self.archive.record(self.SOURCE, url, html)
+
+    def _throttle_url(self, url: str) -> Optional[str]:
+        """URL to rate limit before loading, or None when the page cache will serve it"""
+        if self.page_cache and self.page_cache.is_fresh(url):
+            return None
+        return url
+
+    def _merge_page(self, page: int, page_listings: List[Dict]) -> List[Dict]:
+        """Listings not seen on earlier pages (only new or changed ones when incremental)"""
+        if self.incremental:
+            page_listings = self.incremental.filter(page_listings)
+        new_listings = []
+        for listing in page_listings:
+            if listing["url"] not in self.seen_urls:
+                self.seen_urls.add(listing["url"])
+                new_listings.append(listing)
+        print(f"[PAGE {page}] Added {len(new_listings)} new listings")
+        return new_listings
+
+    def _incremental_exhausted(self) -> bool:
+        """True once an incremental run has seen enough unchanged pages in a row to stop"""
+        if self.incremental and self.incremental.exhausted:
+            print(f"[DONE] No new or changed listings for {self.incremental.stop_after} pages. Stopping.")
+            return True
+        return False
+
+    def iter_pages(self) -> Iterator[List[Dict]]:
+        raise NotImplementedError
+
+    def parse_html(self, html: str) -> Tuple[int, List[Dict]]:
+        """Parse a saved search page offline. Returns (cards found, parsed listings)."""
+        cards = make_soup(html).select(self.CARD_SELECTOR)
+        return len(cards), self._parse_page(cards)
+
+    def _parse_page(self, cards) -> List[Dict]:
+        raise NotImplementedError
+
+    def scrap_all_pages(self) -> List[Dict]:
+        """Scrape ALL listings from page 1 to last."""
+        return [listing for batch in self.iter_pages() for listing in batch]
+
+    def stream(self) -> Iterator[List[Dict]]:
+        """Yield per-page batches of listings, releasing the browser and other resources when done"""
+        try:
+            yield from self.iter_pages()
+        finally:
+            self._close()
+
+    def run(self) -> List[Dict]:
+        return [listing for batch in self.stream() for listing in batch]
+
+    def _close(self):
+        if self.driver and not self.driver_pool:
+            self.driver.quit()
+            self.driver = None
+        if self.http:
+            self.http.close()
+
+    def __del__(self):
+        if hasattr(self, 'driver') and self.driver and not getattr(self, 'driver_pool', None):
+            self.driver.quit()
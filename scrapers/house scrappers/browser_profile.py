@@ -0,0 +1,69 @@
+# browser_profile.py
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+
+
+# Resources the listing parsers never read
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*adservice.google.*", "*facebook.net*",
+    "*hotjar.com*", "*clarity.ms*", "*scorecardresearch.com*",
+]
+
+LEAN_ARGUMENTS = [
+    "--blink-settings=imagesEnabled=false",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-translate",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+    "--mute-audio",
+    "--no-first-run",
+]
+
+
+def build_chrome_options(headless: bool, profile: str = "default") -> Options:
+    """Chrome options shared by every scraper. profile="lean" also strips unneeded features."""
+    options = Options()
+    if headless:
+        options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
+
+    if profile == "lean":
+        for arg in LEAN_ARGUMENTS:
+            options.add_argument(arg)
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.notifications": 2,
+        })
+        # Readiness waits look for the cards, so don't block on every subresource
+        options.page_load_strategy = "eager"
+
+    return options
+
+
+def apply_browser_profile(driver, profile: str = "default", extra_blocked: list = None):
+    """
+    Block resource URLs for this driver through the DevTools protocol.
+
+    Pooled drivers move between sites, so this is applied on every lease and
+    the default profile clears any patterns left by a previous lean site.
+    """
+    patterns = []
+    if profile == "lean":
+        patterns = LEAN_BLOCKED_URLS + list(extra_blocked or [])
+
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except WebDriverException as e:
+        print(f"[BROWSER] Could not apply {profile} profile: {e}")
@@ -0,0 +1,51 @@
+# checkpoint.py
+from typing import Dict, List, Optional
+
+
+class CrawlProgress:
+    """
+    How far one source's crawl has got, snapshotted after every page so a failed run can resume.
+
+    next_page is the first page not yet attempted, frontier holds earlier pages
+    that failed and still need fetching, and seen_urls the listing URLs already
+    handed out. complete is set once the crawl reaches its natural end.
+    """
+
+    def __init__(self, checkpoint: Optional[Dict] = None):
+        checkpoint = checkpoint or {}
+        self.next_page: int = checkpoint.get("next_page", 1)
+        self.last_page: Optional[int] = checkpoint.get("last_page")
+        self.frontier: List[int] = sorted(checkpoint.get("frontier") or [])
+        self.seen_urls = set(checkpoint.get("seen_urls") or ())
+        self.complete = False
+
+    @property
+    def resumed(self) -> bool:
+        return self.next_page > 1 or bool(self.frontier)
+
+    def page_done(self, page: int):
+        if page in self.frontier:
+            self.frontier.remove(page)
+        self.next_page = max(self.next_page, page + 1)
+
+    def page_failed(self, page: int):
+        if page not in self.frontier:
+            self.frontier.append(page)
+        self.next_page = max(self.next_page, page + 1)
+
+    def snapshot(self) -> Dict:
+        """Checkpoint fields for the database (seen URLs are stored per batch instead)"""
+        return {
+            "next_page": self.next_page,
+            "last_page": self.last_page,
+            "frontier": list(self.frontier),
+            "complete": self.complete,
+        }
+
+    def describe(self) -> str:
+        parts = []
+        if self.last_page is None or self.next_page <= self.last_page:
+            parts.append(f"page {self.next_page}" + (f" of {self.last_page}" if self.last_page else ""))
+        if self.frontier:
+            parts.append(f"failed pages {self.frontier}")
+        return " and ".join(parts)
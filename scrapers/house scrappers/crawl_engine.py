@@ -0,0 +1,133 @@
+# crawl_engine.py
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second with bursts of `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Tokens may go negative: later callers queue behind earlier reservations
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self) -> float:
+        """Wait for a token; returns the seconds spent waiting"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class CrawlEngine:
+    """
+    Schedules page fetches under a global concurrency cap and per-host rate limits.
+
+    Fetch functions are ordinary blocking callables (requests or Selenium); the
+    engine runs them on worker threads from an asyncio loop, so a request starts
+    as soon as its host has a token instead of after a fixed sleep.
+    """
+
+    def __init__(self, max_concurrency: int = 8, default_rate: float = 0.5, default_burst: int = 1):
+        self.max_concurrency = max_concurrency
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        # Threading semaphore so the cap holds across scrapers running in different threads
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        # Seconds the fetch now running on each thread spent waiting for budget and a slot
+        self._local = threading.local()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def configure_host(self, url: str, rate: float, burst: int = 1):
+        """Set the request budget for the host of `url` (keeps an existing bucket)"""
+        host = self._host(url)
+        with self._buckets_lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(rate, burst)
+
+    def configure_site(self, site_config: dict):
+        """Register a site from its config.yaml section (scraper.rate_limit or 1/delay)"""
+        scraper_cfg = site_config["scraper"]
+        limit = scraper_cfg.get("rate_limit") or {}
+        rate = limit.get("rate", 1.0 / max(scraper_cfg.get("delay", 1), 0.001))
+        self.configure_host(site_config["website"]["base_url"], rate, limit.get("burst", 1))
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        host = self._host(url)
+        with self._buckets_lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.default_rate, self.default_burst)
+            return self._buckets[host]
+
+    def throttle(self, url: Optional[str]) -> float:
+        """Block until the host of `url` has budget for one more request (no-op for None)"""
+        waited = self.bucket_for(url).acquire() if url else 0.0
+        self._local.queue_wait = waited
+        return waited
+
+    def take_queue_wait(self) -> float:
+        """Queue wait of the fetch running on this thread (from throttle() or map()), reset after reading"""
+        waited = getattr(self._local, "queue_wait", 0.0)
+        self._local.queue_wait = 0.0
+        return waited
+
+    def _call(self, fn: Callable, item, queued_at: float):
+        with self._slots:
+            self._local.queue_wait = time.monotonic() - queued_at
+            return fn(item)
+
+    async def _run_one(self, fn: Callable, item, url: Optional[str], local_slots: asyncio.Semaphore):
+        queued_at = time.monotonic()
+        async with local_slots:
+            if url:
+                await self.bucket_for(url).acquire_async()
+            return await asyncio.to_thread(self._call, fn, item, queued_at)
+
+    async def map_async(self, fn: Callable, items: Iterable, url_for: Callable, concurrency: Optional[int] = None) -> List:
+        items = list(items)
+        local_slots = asyncio.Semaphore(min(concurrency or self.max_concurrency, self.max_concurrency))
+        tasks = [self._run_one(fn, item, url_for(item), local_slots) for item in items]
+        # return_exceptions keeps one failed page from cancelling the rest
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def map(self, fn: Callable, items: Iterable, url_for: Callable, concurrency: Optional[int] = None) -> List:
+        """
+        Run fn(item) for every item, rate limited by the host of url_for(item).
+        Items whose url_for() is None (e.g. served from cache) skip the rate limit.
+
+        Returns results in item order; a failed call yields its exception object.
+        """
+        return asyncio.run(self.map_async(fn, items, url_for, concurrency))
+
+    @classmethod
+    def from_config(cls, config: dict) -> "CrawlEngine":
+        """Build from the crawl_engine section of config.yaml"""
+        return cls(**(config.get("crawl_engine") or {}))
@@ -0,0 +1,116 @@
+# crawl_metrics.py
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+TIMINGS = ("queue_wait", "navigate", "wait", "parse", "total")
+COUNTS = ("bytes", "cards", "parsed")
+
+
+class CrawlMetrics:
+    """
+    Per-page crawl telemetry, optionally streamed to a JSON-lines file.
+
+    A record is opened per page fetch and becomes the current record of the
+    calling thread, so fetch helpers can add timings with
+    `with metrics.timer("navigate"):` without passing it around. Seconds are
+    split into queue_wait (rate limit, worker slot and browser lease),
+    navigate, wait (for listing cards) and parse; total is the whole page.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.records: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+
+    def start(self, source: str, page: int, url: str, queue_wait: float = 0.0) -> Dict:
+        record = {
+            "source": source,
+            "page": page,
+            "url": url,
+            "started_at": time.time(),
+            "queue_wait": queue_wait,
+            "navigate": 0.0,
+            "wait": 0.0,
+            "parse": 0.0,
+            "total": 0.0,
+            "bytes": 0,
+            "cards": 0,
+            "parsed": 0,
+            "cached": False,
+            "failure": None,
+        }
+        record["_clock"] = time.perf_counter()
+        self._local.record = record
+        return record
+
+    def current(self) -> Optional[Dict]:
+        return getattr(self._local, "record", None)
+
+    def detach(self):
+        """Stop attributing this thread's timings to its record (e.g. while the page waits to be parsed)"""
+        self._local.record = None
+
+    @contextmanager
+    def timer(self, field: str, record: Dict = None):
+        record = record or self.current()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if record is not None:
+                record[field] += time.perf_counter() - start
+
+    def note(self, **fields):
+        """Set fields (bytes, cards, cached, failure...) on the current record"""
+        record = self.current()
+        if record is not None:
+            record.update(fields)
+
+    def finish(self, record: Dict):
+        record["total"] = time.perf_counter() - record.pop("_clock")
+        if self.current() is record:
+            self.detach()
+        with self._lock:
+            self.records.append(record)
+            if self._file:
+                self._file.write(json.dumps(record) + "\n")
+                self._file.flush()
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per source: pages, failures, cached pages and (p50, p95) of every timing and count"""
+        with self._lock:
+            records = list(self.records)
+
+        by_source = {}
+        for record in records:
+            by_source.setdefault(record["source"], []).append(record)
+
+        summary = {}
+        for source, rows in by_source.items():
+            stats = {
+                "pages": len(rows),
+                "failures": sum(1 for r in rows if r["failure"]),
+                "cached": sum(1 for r in rows if r["cached"]),
+            }
+            for field in TIMINGS + COUNTS:
+                p50, p95 = np.percentile([r[field] for r in rows], [50, 95])
+                stats[field] = (float(p50), float(p95))
+            summary[source] = stats
+        return summary
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -1,11 +1,24 @@
-from bs4 import BeautifulSoup
-from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from urllib.parse import urlencode
-import time
 import pandas as pd
+from crawl_engine import CrawlEngine
+from waits import wait_for_listings
+from driver_pool import DriverPool
+from page_parsing import make_soup, load_next_data
+from daft_ie_scrapper import embedded_listings
 
 
-def build_daft_url(city, min_price=None, max_price=None, min_beds=None, radius=None, page=1):
+RESULTS_PER_PAGE = 20
+# daft.ie stops paging a query well before the end of a large result list,
+# so searches are split into bands that each stay under this many results
+MAX_RESULTS_PER_QUERY = 1000
+PRICE_CEILING = 10000  # top of the price range when splitting an open-ended search
+MIN_PRICE_BAND = 50  # narrower price bands are split by bedrooms instead
+MAX_BED_BAND = 5  # last bedroom band is "5 or more"
+MAX_EMPTY_PAGES = 3  # stop a query of unknown size after this many empty pages in a row
+
+
+def build_daft_url(city, min_price=None, max_price=None, min_beds=None, radius=None, page=1, max_beds=None):
     base_url = f"https://www.daft.ie/property-for-rent/{city}"
 
     params = {}
@@ -16,6 +29,8 @@ def build_daft_url(city, min_price=None, max_price=None, min_beds=None, radius=N
         params['rentalPrice_to'] = max_price
     if min_beds:
         params['numBeds_from'] = min_beds
+    if max_beds:
+        params['numBeds_to'] = max_beds
     if radius:
         params['radius'] = radius
 
@@ -31,11 +46,35 @@ def build_daft_url(city, min_price=None, max_price=None, min_beds=None, radius=N
     return url
 
 
-def scrape_daft_page(driver, url, seen_urls):
+def load_daft_page_source(driver, url, max_wait=5, page_cache=None):
+    cached = page_cache.get(url) if page_cache else None
+    if cached and cached["fresh"]:
+        return cached["body"]
+
     driver.get(url)
-    time.sleep(5)  # Wait for page to load
+    # Wait for listing cards, at most max_wait seconds
+    try:
+        wait_for_listings(driver, "ul.sc-798c155d-4.kmVnWY > li", timeout=max_wait, max_settle=max_wait)
+    except TimeoutException:
+        pass
+
+    page_source = driver.page_source
+    if page_cache:
+        page_cache.put(url, page_source)
+    return page_source
+
 
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
+def scrape_daft_page(driver, url, seen_urls, max_wait=5, page_cache=None):
+    return homes_from_source(load_daft_page_source(driver, url, max_wait, page_cache), seen_urls)
+
+
+def homes_from_source(page_source, seen_urls):
+    # Structured results embedded in the page: one JSON decode, no hashed class names
+    listings = embedded_listings(page_source)
+    if listings is not None:
+        return homes_from_embedded(listings, seen_urls)
+
+    soup = make_soup(page_source)
 
     # Find homes container
     homes_html = soup.find('ul', class_='sc-798c155d-4 kmVnWY')
@@ -107,7 +146,116 @@ def scrape_daft_page(driver, url, seen_urls):
     return page_homes
 
 
-def scrape_all_daft_pages(city, min_price=None, max_price=None, min_beds=None, radius=None):
+def homes_from_embedded(listings, seen_urls):
+    page_homes = []
+    duplicates_found = 0
+
+    for listing in listings:
+        home_url = listing.get('seoFriendlyPath')
+        if not home_url:
+            continue
+        if home_url in seen_urls:
+            duplicates_found += 1
+            continue
+        seen_urls.add(home_url)
+
+        description = ' | '.join(str(part) for part in (
+            listing.get('numBedrooms'), listing.get('numBathrooms'), listing.get('propertyType')) if part)
+
+        page_homes.append({
+            'Category': listing.get('propertyType') or 'N/A',
+            'Location': listing.get('title') or 'N/A',
+            'Price': listing.get('price') or 'N/A',
+            'Description': description or 'N/A',
+            'Home_Url': home_url,
+        })
+
+    if duplicates_found > 0:
+        print(f"  ⚠️ Skipped {duplicates_found} duplicate(s) on this page")
+
+    return page_homes
+
+
+def search_total(page_source):
+    """Total results for the query, from the paging block of the embedded JSON (None if absent)"""
+    data = load_next_data(page_source)
+    if data is None:
+        return None
+    paging = (data.get("props") or {}).get("pageProps", {}).get("paging") or {}
+    total = paging.get("totalResults")
+    return int(total) if total is not None else None
+
+
+def band_url(city, band, radius=None, page=1):
+    return build_daft_url(city, band["min_price"], band["max_price"], band["min_beds"], radius, page, band["max_beds"])
+
+
+def describe_band(band):
+    price = f"€{band['min_price'] or 0}-{'€' + str(band['max_price']) if band['max_price'] else 'any'}"
+    beds = f"{band['min_beds'] or 'any'}-{band['max_beds'] or 'any'} beds"
+    return f"{price}, {beds}"
+
+
+def split_band(band):
+    """
+    Split a search band into disjoint narrower bands: halve the price range
+    first, then one band per bedroom count. Returns [] if it cannot be split.
+    """
+    low = band["min_price"] or 0
+    high = band["max_price"]
+    if high is None and low < PRICE_CEILING:
+        return [dict(band, max_price=PRICE_CEILING), dict(band, min_price=PRICE_CEILING + 1)]
+    if high is not None and high - low > MIN_PRICE_BAND:
+        middle = (low + high) // 2
+        return [dict(band, max_price=middle), dict(band, min_price=middle + 1)]
+
+    # Price range is as narrow as it goes, split by bedrooms
+    low_beds = band["min_beds"] or 1
+    high_beds = band["max_beds"]
+    top = min(high_beds, MAX_BED_BAND) if high_beds else MAX_BED_BAND
+    if low_beds >= top:
+        return []
+    return ([dict(band, max_beds=low_beds)]
+            + [dict(band, min_beds=beds, max_beds=beds) for beds in range(low_beds + 1, top)]
+            + [dict(band, min_beds=top, max_beds=high_beds)])
+
+
+def partition_search(city, min_price, max_price, min_beds, radius, probe, engine, max_results=MAX_RESULTS_PER_QUERY,
+                     url_for=None):
+    """
+    Split a search into bands of at most `max_results` results each.
+
+    `probe(band)` loads page 1 of a band and returns (total results, page homes);
+    each level of the split is probed in parallel through the engine. Returns
+    (band, total, first page homes) for every leaf band, in price order. If the
+    site reports no total the whole search is returned as a single band.
+    """
+    root = {"min_price": min_price, "max_price": max_price, "min_beds": min_beds, "max_beds": None}
+    bands = []
+    level = [root]
+    while level:
+        results = engine.map(probe, level, url_for or (lambda band: band_url(city, band, radius)))
+        next_level = []
+        for band, result in zip(level, results):
+            if isinstance(result, Exception):
+                print(f"  ⚠️ Could not size band {describe_band(band)}: {result}")
+                continue
+            total, first_page = result
+            children = split_band(band) if total is not None and total > max_results else []
+            if children:
+                next_level.extend(children)
+                continue
+            if total is not None and total > max_results:
+                print(f"  ⚠️ Band {describe_band(band)} still has {total} results and cannot be split further")
+            bands.append((band, total, first_page))
+        level = next_level
+
+    bands.sort(key=lambda leaf: (leaf[0]["min_price"] or 0, leaf[0]["min_beds"] or 0))
+    return bands
+
+
+def scrape_all_daft_pages(city, min_price=None, max_price=None, min_beds=None, radius=None, driver_pool=None, crawl_engine=None,
+                          page_cache=None, concurrency=4, max_results=MAX_RESULTS_PER_QUERY):
 
     print("=" * 100)
     print("Daft.ie Property Scraper")
@@ -119,43 +267,75 @@ def scrape_all_daft_pages(city, min_price=None, max_price=None, min_beds=None, r
     print(f"  Radius: {radius or 'any'}m")
     print("\n" + "=" * 100 + "\n")
 
-    driver = webdriver.Chrome()
-    driver.maximize_window()
+    # Request budget for daft.ie, shared with other scrapers when an engine is passed in
+    engine = crawl_engine or CrawlEngine(default_rate=0.5)
+
+    # Bands are crawled in parallel, each page leasing a browser from the pool
+    own_pool = driver_pool is None
+    if own_pool:
+        driver_pool = DriverPool(size=concurrency, headless=False)
+
+    def fresh(url):
+        return page_cache and page_cache.is_fresh(url)
+
+    def fetch(band, page, seen_urls):
+        url = band_url(city, band, radius, page)
+        with driver_pool.lease() as driver:
+            page_source = load_daft_page_source(driver, url, page_cache=page_cache)
+        return page_source, homes_from_source(page_source, seen_urls)
+
+    def probe(band):
+        page_source, page_homes = fetch(band, 1, set())
+        return search_total(page_source), page_homes
+
+    def crawl_band(leaf):
+        band, total, band_homes = leaf
+        band_homes = list(band_homes)
+        seen_urls = {home['Home_Url'] for home in band_homes}
+        last_page = -(-total // RESULTS_PER_PAGE) if total is not None else None
+        consecutive_empty_pages = 0 if band_homes else 1
+        page = 2
+
+        # A sized band stops at its last page; otherwise fall back to the empty-page check
+        while page <= last_page if last_page is not None else consecutive_empty_pages < MAX_EMPTY_PAGES:
+            url = band_url(city, band, radius, page)
+            if not fresh(url):
+                engine.throttle(url)
+            page_homes = fetch(band, page, seen_urls)[1]
+            consecutive_empty_pages = 0 if page_homes else consecutive_empty_pages + 1
+            band_homes.extend(page_homes)
+            page += 1
 
-    all_homes = []
-    seen_urls = set()  # Track URLs to avoid duplicates
-    page = 1
-    consecutive_empty_pages = 0
-    max_empty_pages = 3  # Stop after 3 consecutive empty pages
+        print(f"  ✓ Band {describe_band(band)}: {len(band_homes)} homes from {page - 1} pages")
+        return band_homes
 
     try:
-        while True:
-            url = build_daft_url(city, min_price, max_price, min_beds, radius, page)
-            print(f"Scraping page {page}...")
-            print(f"URL: {url}")
-
-            page_homes = scrape_daft_page(driver, url, seen_urls)
-
-            if not page_homes:
-                consecutive_empty_pages += 1
-                print(f"  ⚠️ No new homes found on page {page} (empty count: {consecutive_empty_pages})")
-
-                if consecutive_empty_pages >= max_empty_pages:
-                    print(f"\n✓ Reached end after {page} pages (no new homes for {max_empty_pages} consecutive pages)")
-                    break
-            else:
-                consecutive_empty_pages = 0  # Reset counter
-                all_homes.extend(page_homes)
-                print(f"  ✓ Found {len(page_homes)} unique homes on page {page}")
-                print(f"  Total unique homes so far: {len(all_homes)}")
-                print(f"  Total URLs tracked: {len(seen_urls)}")
-
-            page += 1
-            time.sleep(2)  # Be nice to the server
-
+        print("Sizing search bands...")
+        bands = partition_search(city, min_price, max_price, min_beds, radius, probe, engine, max_results,
+                                 url_for=lambda band: None if fresh(band_url(city, band, radius)) else band_url(city, band, radius))
+        print(f"Crawling {len(bands)} band(s) with up to {concurrency} in parallel\n")
+        for band, total, _ in bands:
+            print(f"  {describe_band(band)}: {total if total is not None else 'unknown'} results")
+
+        # Pages inside a band throttle themselves, so bands only need a worker slot
+        results = engine.map(crawl_band, bands, lambda leaf: None, concurrency=concurrency)
     finally:
-        driver.quit()
+        if own_pool:
+            driver_pool.close()
+
+    # Bands are disjoint but listings can move between them mid-crawl, so dedup on merge
+    all_homes = []
+    seen_urls = set()
+    for (band, _, _), band_homes in zip(bands, results):
+        if isinstance(band_homes, Exception):
+            print(f"  ⚠️ Band {describe_band(band)} failed: {band_homes}")
+            continue
+        for home in band_homes:
+            if home['Home_Url'] not in seen_urls:
+                seen_urls.add(home['Home_Url'])
+                all_homes.append(home)
 
+    print(f"\n✓ Merged {len(all_homes)} unique homes from {len(bands)} band(s)")
     return all_homes
 
 
@@ -1,151 +1,182 @@
 # daft_ie_scraper.py
-import yaml
-import re
-import time
-from typing import List, Dict, Set
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-
-
-class DaftIEScraper:
-    def __init__(self, config_path: str = "D:/Live Labor-Housing Mismatch Index 2025 (Dublin)/config.yaml"):
-        self.config = self._load_config(config_path)
-        self.driver = None
-        self.wait = None
-        self.seen_urls: Set[str] = set()
-        self._init_driver()
-
-    def _load_config(self, path: str) -> dict:
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)["daft_ie"]
-
-    def _init_driver(self):
-        options = Options()
-        if self.config["scraper"]["headless"]:
-            options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
-        self.wait = WebDriverWait(self.driver, self.config["scraper"]["timeout"])
-
-    def _get_page_url(self, page: int) -> str:
-        base = self.config["website"]["base_url"]
-        path = self.config["website"]["search_path"]
-        # Replace ?page=1 with ?page={page}
-        path = re.sub(r'\?page=\d+', f'?page={page}', path)
-        return base + path
-
-    def _detect_furnished(self, text: str) -> str:
-        t = text.lower()
-        if "unfurnished" in t:
-            return "No"
-        elif "partially furnished" in t or "part-furnished" in t:
-            return "Partially"
-        elif "furnished" in t:
-            return "Yes"
-        else:
-            return "Unknown"
-
-    def _extract_beds_baths(self, description: str) -> tuple:
-        """Extract beds and baths from description text"""
-        beds = 1  # default minimum
-        baths = 1  # default minimum
-
-        desc_lower = description.lower()
-
-        # Extract beds
-        beds_match = re.search(r'(\d+)\s*bed', desc_lower)
-        if beds_match:
-            beds = int(beds_match.group(1))
-
-        # Extract baths
-        baths_match = re.search(r'(\d+)\s*bath', desc_lower)
-        if baths_match:
-            baths = int(baths_match.group(1))
-
-        return beds, baths
-
-    def scrap_all_pages(self) -> List[Dict]:
-        all_listings = []
-        page = 1
-        consecutive_empty_pages = 0
-        max_empty_pages = 3
-
-        while True:
-            url = self._get_page_url(page)
-            print(f"\n[PAGE {page}] Loading: {url}")
-
-            try:
-                self.driver.get(url)
-                time.sleep(self.config["scraper"]["delay"])
-            except TimeoutException:
-                print(f"[ERROR] Page {page} timed out. Stopping.")
-                break
-
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            homes_html = soup.find('ul', class_='sc-798c155d-4 kmVnWY')
-
-            if not homes_html:
-                consecutive_empty_pages += 1
-                print(f"[INFO] No listings container on page {page}. Empty count: {consecutive_empty_pages}")
-                if consecutive_empty_pages >= max_empty_pages:
-                    print(f"[DONE] Stopped after {max_empty_pages} consecutive empty pages.")
+from collections import deque
+from typing import Iterator, List, Dict, Optional, Tuple
+from waits import wait_for_listings
+from page_parsing import make_soup, load_next_data
+from normalize import normalize_listings
+from parse_pool import ParsePool, parse_inline
+from base_scraper import BaseScraper
+
+LISTING_SELECTOR = "ul.sc-798c155d-4.kmVnWY > li"
+
+
+def embedded_listings(html: str) -> Optional[List[Dict]]:
+    """
+    Listing objects from the search results JSON that daft.ie embeds in every page.
+
+    Returns None when the page has no embedded results, so callers can fall
+    back to the CSS selectors.
+    """
+    data = load_next_data(html)
+    if data is None:
+        return None
+    listings = (data.get("props") or {}).get("pageProps", {}).get("listings")
+    if listings is None:
+        return None
+    return [item.get("listing", item) for item in listings]
+
+
+class DaftIEScraper(BaseScraper):
+    SOURCE = "daft.ie"
+    CONFIG_SECTION = "daft_ie"
+    CARD_SELECTOR = LISTING_SELECTOR
+
+    def __init__(self, *args, parse_pool=None, parse_only=False, **kwargs):
+        super().__init__(*args, parse_only=parse_only, **kwargs)
+        # Optional ParsePool: pages are parsed in worker processes while the next one loads
+        self.parse_pool = parse_pool
+        self._owns_parse_pool = False
+        if parse_pool is None and not parse_only and self.config["scraper"].get("parse_workers", 0) > 0:
+            self.parse_pool = ParsePool(self.config["scraper"]["parse_workers"])
+            self._owns_parse_pool = True
+
+    def _wait_for_cards(self, driver):
+        # The embedded JSON is in the server-rendered HTML, so json mode needs no wait.
+        # Otherwise delay is only an upper bound: return once the listing cards have rendered.
+        # Empty pages are counted by the consecutive-empty check in _merge_parsed.
+        if self._extract_mode() == "json":
+            return
+        wait_for_listings(driver, self.CARD_SELECTOR,
+                          timeout=self.config["scraper"]["delay"],
+                          max_settle=self.config["scraper"]["delay"])
+
+    def iter_pages(self) -> Iterator[List[Dict]]:
+        """Scrape pages until 3 in a row are empty, yielding each page's new listings"""
+        total = 0
+        page = self.progress.next_page
+        if self.progress.resumed:
+            print(f"[RESUME] Continuing at {self.progress.describe()}")
+        self._empty_pages = 0
+        # Pages fetched but not yet merged; with a parse pool the next fetch overlaps their parsing
+        pending = deque()
+        max_pending = self.parse_pool.workers * 2 if self.parse_pool else 1
+        stopped = False
+
+        try:
+            while not stopped:
+                url = self._get_page_url(page)
+                print(f"\n[PAGE {page}] Loading: {url}")
+                record = self.metrics.start(self.SOURCE, page, url)
+                self.engine.throttle(self._throttle_url(url))
+                page_source = self._render_page(page, url)
+                record["queue_wait"] += self.engine.take_queue_wait()
+                if page_source is None:
+                    print(f"[ERROR] Page {page} timed out. Stopping.")
+                    record["failure"] = "timeout"
+                    self.metrics.finish(record)
                     break
-                page += 1
-                continue
-
-            homes_items = homes_html.find_all('li')
+                record["bytes"] = len(page_source.encode("utf-8"))
+                # The record is finished when the parsed page is merged
+                self.metrics.detach()
 
-            if not homes_items:
-                consecutive_empty_pages += 1
-                print(f"[INFO] No listings on page {page}. Empty count: {consecutive_empty_pages}")
-                if consecutive_empty_pages >= max_empty_pages:
-                    print(f"[DONE] Stopped after {max_empty_pages} consecutive empty pages.")
-                    break
+                if self.parse_pool:
+                    pending.append((page, self.parse_pool.submit(self, page_source), record))
+                else:
+                    pending.append((page, parse_inline(self, page_source), record))
                 page += 1
-                continue
 
-            print(f"[PAGE {page}] Found {len(homes_items)} potential listings")
-
-            page_listings = self._parse_page(homes_items)
-
-            if not page_listings:
-                consecutive_empty_pages += 1
-                print(f"[PAGE {page}] No valid listings after parsing. Empty count: {consecutive_empty_pages}")
-                if consecutive_empty_pages >= max_empty_pages:
-                    print(f"[DONE] Stopped after {max_empty_pages} consecutive empty pages.")
-                    break
+                # Merge in page order; block only when the window of in-flight pages is full
+                while pending and (pending[0][1].done() or len(pending) >= max_pending):
+                    done_page, future, record = pending.popleft()
+                    new_listings, stopped = self._merge_parsed(done_page, future, record)
+                    self.progress.page_done(done_page)
+                    total += len(new_listings)
+                    yield new_listings
+                    if stopped:
+                        break
+
+            while pending and not stopped:
+                done_page, future, record = pending.popleft()
+                new_listings, stopped = self._merge_parsed(done_page, future, record)
+                self.progress.page_done(done_page)
+                total += len(new_listings)
+                yield new_listings
+        finally:
+            for _, future, _ in pending:
+                future.cancel()
+        # Stopping on empty pages or unchanged listings is the natural end; a timeout is not
+        self.progress.complete = stopped
+
+        print(f"\n[FINAL] Total unique listings scraped: {total}")
+
+    def _merge_parsed(self, page: int, future, record: Dict) -> Tuple[List[Dict], bool]:
+        """New listings from one parsed page, and whether the crawl should stop"""
+        max_empty_pages = 3
+        try:
+            card_count, page_listings, record["parse"] = future.result()
+        except Exception as e:
+            print(f"[WARN] Page {page} failed to parse: {e}")
+            card_count, page_listings = 0, []
+            record["failure"] = type(e).__name__
+        record.update(cards=card_count, parsed=len(page_listings))
+        self.metrics.finish(record)
+
+        if not page_listings:
+            self._empty_pages += 1
+            if card_count:
+                print(f"[PAGE {page}] No valid listings after parsing. Empty count: {self._empty_pages}")
             else:
-                consecutive_empty_pages = 0
-                new_count = 0
-                for listing in page_listings:
-                    if listing["url"] not in self.seen_urls:
-                        self.seen_urls.add(listing["url"])
-                        all_listings.append(listing)
-                        new_count += 1
-                print(f"[PAGE {page}] Added {new_count} new listings")
-
-            page += 1
-            time.sleep(1)
-
-        print(f"\n[FINAL] Total unique listings scraped: {len(all_listings)}")
-        return all_listings
+                print(f"[INFO] No listings on page {page}. Empty count: {self._empty_pages}")
+            if self._empty_pages >= max_empty_pages:
+                print(f"[DONE] Stopped after {max_empty_pages} consecutive empty pages.")
+                return [], True
+            return [], False
+
+        print(f"[PAGE {page}] Found {card_count} potential listings")
+        self._empty_pages = 0
+        new_listings = self._merge_page(page, page_listings)
+        return new_listings, self._incremental_exhausted()
+
+    def _extract_mode(self) -> str:
+        return self.config["scraper"].get("extract_mode", "css")
+
+    def parse_html(self, html: str) -> Tuple[int, List[Dict]]:
+        """Parse one search page. Returns (cards found, parsed listings)."""
+        if self._extract_mode() == "json":
+            listings = embedded_listings(html)
+            if listings is not None:
+                return len(listings), self._parse_embedded(listings)
+            print("[JSON] No embedded listing data, falling back to CSS selectors")
+
+        homes_html = make_soup(html).find('ul', class_='sc-798c155d-4 kmVnWY')
+        homes_items = homes_html.find_all('li') if homes_html else []
+        return len(homes_items), self._parse_page(homes_items)
+
+    def _parse_embedded(self, listings: List[Dict]) -> List[Dict]:
+        """Map daft.ie's embedded listing objects onto raw card fields in one pass"""
+        raw_rows = []
+        for listing in listings:
+            url = listing.get("seoFriendlyPath")
+            if not url:
+                continue
+            category_text = listing.get("propertyType") or ''
+            # Same fields the card shows: "2 Bed | 1 Bath | Apartment"
+            description = ' | '.join(str(part) for part in (
+                listing.get("numBedrooms"), listing.get("numBathrooms"), category_text) if part)
+            raw_rows.append({
+                "source": self.SOURCE,
+                "address": listing.get("title") or '',
+                "url": url,
+                "price_text": listing.get("price") or '',
+                "summary": category_text,
+                "beds_text": description,
+                "baths_text": description,
+                "furnished_text": description + ' ' + category_text,
+            })
+        return normalize_listings(raw_rows)
 
     def _parse_page(self, homes_items) -> List[Dict]:
-        listings = []
+        raw_rows = []
 
         for i, home in enumerate(homes_items, 1):
             try:
@@ -180,67 +211,25 @@ class DaftIEScraper:
                 else:
                     description = ''
 
-                # Extract rent from price text
-                price_text = price.text if price else ''
-                rent_match = re.search(r'€([\d,]+)', price_text)
-                rent_value = int(rent_match.group(1).replace(',', '')) if rent_match else None
-
-                # Check if rent is weekly or monthly
-                price_lower = price_text.lower()
-                if 'month' in price_lower or '/m' in price_lower or 'pm' in price_lower:
-                    rent_eur = rent_value
-                    rent_period = "monthly"
-                    original_rent = rent_value
-                elif 'week' in price_lower or '/w' in price_lower or 'pw' in price_lower:
-                    # Weekly rent, convert to monthly
-                    rent_period = "weekly"
-                    original_rent = rent_value
-                    rent_eur = round(rent_value * (52 / 12)) if rent_value else None
-                else:
-                    # Default to monthly if unclear
-                    rent_eur = rent_value
-                    rent_period = "monthly"
-                    original_rent = rent_value
-
-                # Extract beds and baths from description
-                beds, baths = self._extract_beds_baths(description)
-
-                # Build summary from category
                 category_text = category.text if category else ''
-                summary = category_text
-
-                # Build address from location
-                address = location.text if location else ''
-
-                # Detect furnished status
-                furnished = self._detect_furnished(description + ' ' + category_text)
-
-                data = {
-                    "source": "daft.ie",
-                    "address": address,
+                raw_rows.append({
+                    "source": self.SOURCE,
+                    "address": location.text if location else '',
                     "url": home_url,
-                    "rent_eur": rent_eur,
-                    "rent_period": rent_period,
-                    "original_rent": original_rent,
-                    "summary": summary,
-                    "beds": beds,
-                    "baths": baths,
-                    "furnished": furnished,
-                }
-
-                listings.append(data)
+                    "price_text": price.text if price else '',
+                    "summary": category_text,
+                    "beds_text": description,
+                    "baths_text": description,
+                    "furnished_text": description + ' ' + category_text,
+                })
 
             except Exception as e:
                 print(f"  [WARN] Failed item {i}: {e}")
                 continue
 
-        return listings
-
-    def run(self) -> List[Dict]:
-        listings = self.scrap_all_pages()
-        self.driver.quit()
-        return listings
+        return normalize_listings(raw_rows)
 
-    def __del__(self):
-        if hasattr(self, 'driver') and self.driver:
-            self.driver.quit()
+    def _close(self):
+        if self._owns_parse_pool:
+            self.parse_pool.close()
+        super()._close()
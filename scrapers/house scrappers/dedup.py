@@ -0,0 +1,195 @@
+# dedup.py
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Addresses are compared as sets of character 3-grams, estimated with MinHash
+# and bucketed with LSH so only listings that collide are compared exactly
+SHINGLE_SIZE = 3
+NUM_HASHES = 64
+LSH_BANDS = 16  # 16 bands of 4 rows: pairs above ~0.5 similarity usually collide
+MATCH_THRESHOLD = 0.6  # exact 3-gram Jaccard needed to call two addresses the same
+RENT_TOLERANCE = 100  # EUR/month difference still treated as the same flat
+HASH_PRIME = (1 << 31) - 1
+
+ABBREVIATIONS = {
+    "apt": "apartment", "no": "", "rd": "road", "st": "street", "ave": "avenue", "sq": "square",
+    "ct": "court", "pk": "park", "dr": "drive", "ln": "lane", "tce": "terrace", "co": "",
+}
+# Words every Dublin address shares; dropping them keeps the 3-grams distinctive
+STOP_WORDS = {"county", "dublin", "ireland", "to", "let", "rent"}
+
+EIRCODE_PATTERN = re.compile(r'\b[ad]\d{2}\s?[a-z0-9]{4}\b')
+POSTAL_DISTRICT_PATTERN = re.compile(r'\b(?:dublin|d)\s?(\d{1,2}w?)\b')
+NON_WORD_PATTERN = re.compile(r'[^a-z0-9]+')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+_rng = np.random.default_rng(20251)
+_HASH_A = _rng.integers(1, HASH_PRIME, NUM_HASHES, dtype=np.int64)
+_HASH_B = _rng.integers(0, HASH_PRIME, NUM_HASHES, dtype=np.int64)
+
+
+def normalize_address(address: str) -> str:
+    """
+    Canonical form of an address for matching across sites.
+
+    Lowercases, drops Eircodes, rewrites "D8"/"Dublin 8" as "d8", expands
+    common abbreviations and removes words every Dublin address shares.
+    """
+    text = EIRCODE_PATTERN.sub(" ", (address or "").lower())
+    text = POSTAL_DISTRICT_PATTERN.sub(lambda m: f" d{m.group(1)} ", text)
+    words = []
+    seen = set()
+    for word in NON_WORD_PATTERN.sub(" ", text).split():
+        word = ABBREVIATIONS.get(word, word)
+        # Sites repeat the area ("Swords, Co. Dublin, Swords, Co. Dublin"), keep it once
+        if word and word not in STOP_WORDS and word not in seen:
+            seen.add(word)
+            words.append(word)
+    return " ".join(words)
+
+
+def shingles(text: str) -> Set[int]:
+    compact = text.replace(" ", "")
+    if len(compact) <= SHINGLE_SIZE:
+        return {zlib.crc32(compact.encode())} if compact else set()
+    return {zlib.crc32(compact[i:i + SHINGLE_SIZE].encode()) for i in range(len(compact) - SHINGLE_SIZE + 1)}
+
+
+def minhash(shingle_set: Set[int]) -> np.ndarray:
+    if not shingle_set:
+        return np.full(NUM_HASHES, HASH_PRIME, dtype=np.int64)
+    values = np.fromiter(shingle_set, dtype=np.int64, count=len(shingle_set)) % HASH_PRIME
+    return ((_HASH_A[:, None] * values[None, :] + _HASH_B[:, None]) % HASH_PRIME).min(axis=1)
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _numbers(text: str) -> Set[str]:
+    return set(NUMBER_PATTERN.findall(text))
+
+
+def _rent_buckets(rent) -> List[Tuple[int, int]]:
+    """
+    Two offset grids of width 2*RENT_TOLERANCE: rents within the tolerance
+    always share a bucket on at least one grid.
+    """
+    if pd.isna(rent):
+        return [(-1, -1)]
+    width = 2 * RENT_TOLERANCE
+    return [(0, int(rent // width)), (1, int((rent + RENT_TOLERANCE) // width))]
+
+
+def candidate_pairs(rentals: pd.DataFrame, signatures: np.ndarray) -> Set[Tuple[int, int]]:
+    """Row positions that share an LSH band, bed count and rent bucket (never all pairs)"""
+    rows_per_band = NUM_HASHES // LSH_BANDS
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    beds = rentals["beds"].tolist()
+    rents = rentals["rent_eur"].tolist()
+    for position in range(len(rentals)):
+        bed_key = None if pd.isna(beds[position]) else int(beds[position])
+        for rent_key in _rent_buckets(rents[position]):
+            for band in range(LSH_BANDS):
+                band_key = signatures[position, band * rows_per_band:(band + 1) * rows_per_band].tobytes()
+                buckets[(band, band_key, bed_key, rent_key)].append(position)
+
+    pairs = set()
+    for members in buckets.values():
+        if len(members) > 1:
+            for i, left in enumerate(members):
+                for right in members[i + 1:]:
+                    pairs.add((left, right))
+    return pairs
+
+
+def is_same_listing(left: Dict, right: Dict) -> bool:
+    """Exact check of an LSH candidate pair"""
+    if left["source"] == right["source"]:
+        return False  # Sites dedup their own listings by URL; only match across sources
+    if not pd.isna(left["rent_eur"]) and not pd.isna(right["rent_eur"]) \
+            and abs(left["rent_eur"] - right["rent_eur"]) > RENT_TOLERANCE:
+        return False
+    # "Apartment 22" and "Apartment 23" in the same block are different flats
+    left_numbers, right_numbers = _numbers(left["key"]), _numbers(right["key"])
+    if not (left_numbers <= right_numbers or right_numbers <= left_numbers):
+        return False
+    return jaccard(left["shingles"], right["shingles"]) >= MATCH_THRESHOLD
+
+
+def _rent_gap(left: Dict, right: Dict) -> float:
+    if pd.isna(left["rent_eur"]) or pd.isna(right["rent_eur"]):
+        return RENT_TOLERANCE
+    return abs(left["rent_eur"] - right["rent_eur"])
+
+
+def _find(parents: List[int], position: int) -> int:
+    while parents[position] != position:
+        parents[position] = parents[parents[position]]
+        position = parents[position]
+    return position
+
+
+def resolve_canonical_ids(rentals: pd.DataFrame) -> Tuple[pd.Series, Dict]:
+    """
+    Canonical listing id for every stored rental.
+
+    Expects id, source, address, rent_eur and beds columns. Listings that are
+    the same flat on different sites are clustered and get the smallest id in
+    their cluster (the first one stored); all others keep their own id. A
+    cluster never holds two listings from the same source.
+    Returns (canonical id per row indexed like `rentals`, stats).
+    """
+    index = rentals.index
+    rentals = rentals.reset_index(drop=True)
+    keys = rentals["address"].map(normalize_address)
+    shingle_sets = keys.map(shingles).tolist()
+    signatures = np.vstack([minhash(s) for s in shingle_sets]) if len(rentals) else np.empty((0, NUM_HASHES))
+
+    rows = rentals[["source", "rent_eur"]].to_dict("records")
+    for row, key, shingle_set in zip(rows, keys, shingle_sets):
+        row["key"] = key
+        row["shingles"] = shingle_set
+
+    candidates = candidate_pairs(rentals, signatures)
+    matched = [(-jaccard(rows[left]["shingles"], rows[right]["shingles"]), _rent_gap(rows[left], rows[right]), left, right)
+               for left, right in candidates if is_same_listing(rows[left], rows[right])]
+
+    # A cluster holds at most one listing per source: without this, one listing matching two
+    # different flats on another site would merge them transitively. Closest matches
+    # (most similar address, then nearest rent) claim their listings first.
+    parents = list(range(len(rentals)))
+    cluster_sources = [{row["source"]} for row in rows]
+    matches = 0
+    for _, _, left, right in sorted(matched):
+        left_root, right_root = _find(parents, left), _find(parents, right)
+        if left_root == right_root or cluster_sources[left_root] & cluster_sources[right_root]:
+            continue
+        matches += 1
+        root, child = min(left_root, right_root), max(left_root, right_root)
+        parents[child] = root
+        cluster_sources[root] |= cluster_sources[child]
+
+    ids = rentals["id"].tolist()
+    cluster_ids: Dict[int, int] = {}
+    for position in range(len(rentals)):
+        root = _find(parents, position)
+        cluster_ids[root] = min(cluster_ids.get(root, ids[position]), ids[position])
+    canonical = pd.Series([cluster_ids[_find(parents, p)] for p in range(len(rentals))],
+                          index=index, dtype="int64")
+
+    stats = {
+        "listings": len(rentals),
+        "candidates": len(candidates),
+        "matches": matches,
+        "unique": canonical.nunique(),
+    }
+    return canonical, stats
@@ -0,0 +1,118 @@
+# driver_pool.py
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+from browser_profile import build_chrome_options
+
+
+class DriverPool:
+    """Warm Chrome instances leased to scrapers instead of one browser per scraper"""
+
+    def __init__(self, size: int = 2, headless: bool = True, max_pages: int = 50, browser_profile: str = "default"):
+        self.size = size
+        self.headless = headless
+        # Launch-time flags only; per-site URL blocking is applied by scrapers on lease
+        self.browser_profile = browser_profile
+        self.max_pages = max_pages
+
+        self.driver_path = None
+        self._idle = queue.LifoQueue()
+        self._page_counts = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create_driver(self):
+        # Resolve chromedriver once for the whole run, and only if a browser is needed
+        with self._lock:
+            if self.driver_path is None:
+                self.driver_path = ChromeDriverManager().install()
+
+        driver = webdriver.Chrome(service=Service(self.driver_path), options=build_chrome_options(self.headless, self.browser_profile))
+        self._page_counts[id(driver)] = 0
+        print(f"[POOL] Started browser ({self._created}/{self.size})")
+        return driver
+
+    def _discard(self, driver):
+        """Quit a driver and free its slot"""
+        self._page_counts.pop(id(driver), None)
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @staticmethod
+    def is_healthy(driver) -> bool:
+        """Cheap round trip to check the browser session is still alive"""
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def acquire(self, timeout: float = None):
+        """Lease a healthy driver, starting a new one if the pool has room"""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._create_driver()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                driver = self._idle.get(timeout=timeout)
+
+            if self.is_healthy(driver):
+                return driver
+            print("[POOL] Dropping unresponsive browser")
+            self._discard(driver)
+
+    def release(self, driver, pages: int = 1):
+        """Return a driver, recycling it once it has served max_pages pages"""
+        count = self._page_counts.get(id(driver), 0) + pages
+        self._page_counts[id(driver)] = count
+
+        if self._closed or count >= self.max_pages:
+            if not self._closed:
+                print(f"[POOL] Recycling browser after {count} pages")
+            self._discard(driver)
+            return
+
+        self._idle.put(driver)
+
+    @contextmanager
+    def lease(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quit all idle drivers. Drivers still leased are quit on release."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,167 @@
+# enrichment.py
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from crawl_engine import CrawlEngine
+from http_fetcher import HttpFetcher
+from page_parsing import make_soup, load_next_data
+
+
+SQM_PATTERN = re.compile(r'(\d+(?:[.,]\d+)?)\s*(?:m2|m²|sq\.?\s?m(?:etres|eters)?\b|square\s+met)', re.I)
+SQFT_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*(?:sq\.?\s?ft|square\s+feet|ft2|ft²)', re.I)
+BER_PATTERN = re.compile(r'\bBER(?:\s+rating)?\s*[:\-]?\s*(A[1-3]|B[1-3]|C[1-3]|D[12]|E[12]|F|G|exempt)\b', re.I)
+BER_ASSET_PATTERN = re.compile(r'ber[_\-/]?(a[1-3]|b[1-3]|c[1-3]|d[12]|e[12]|f|g|exempt)\b', re.I)
+SQFT_PER_SQM = 10.7639
+MAX_DESCRIPTION = 4000
+
+DESCRIPTION_SELECTORS = (
+    "[data-testid='description']",
+    "#description",
+    ".property-description",
+    "#brochure .description",
+    "section.description",
+)
+
+
+def detect_furnished_text(text: str) -> Optional[str]:
+    """Yes / Partially / No from listing text, or None if it does not say"""
+    text = text.lower()
+    if "unfurnished" in text:
+        return "No"
+    if "partially furnished" in text or "part-furnished" in text or "part furnished" in text:
+        return "Partially"
+    if "furnished" in text:
+        return "Yes"
+    return None
+
+
+def parse_floor_area(text: str) -> Optional[float]:
+    match = SQM_PATTERN.search(text)
+    if match:
+        return float(match.group(1).replace(",", "."))
+    match = SQFT_PATTERN.search(text)
+    if match:
+        return round(float(match.group(1).replace(",", "")) / SQFT_PER_SQM, 1)
+    return None
+
+
+def parse_ber(text: str, html: str) -> Optional[str]:
+    match = BER_PATTERN.search(text) or BER_ASSET_PATTERN.search(html)
+    return match.group(1).upper() if match else None
+
+
+def _embedded_details(html: str) -> Dict:
+    """Fields of the embedded listing JSON on daft.ie detail pages ({} elsewhere)"""
+    data = load_next_data(html)
+    listing = ((data or {}).get("props") or {}).get("pageProps", {}).get("listing")
+    if not isinstance(listing, dict):
+        return {}
+    details = {}
+    ber = listing.get("ber")
+    if isinstance(ber, dict) and ber.get("rating"):
+        details["ber"] = str(ber["rating"]).upper()
+    floor_area = listing.get("floorArea")
+    if isinstance(floor_area, dict) and floor_area.get("value"):
+        value = float(floor_area["value"])
+        details["floor_area_sqm"] = value if floor_area.get("unit", "METRES_SQUARED").startswith("METRES") \
+            else round(value / SQFT_PER_SQM, 1)
+    if listing.get("description"):
+        details["description"] = listing["description"]
+    facilities = " ".join(str(f.get("name", f)) if isinstance(f, dict) else str(f)
+                          for f in listing.get("facilities") or [])
+    furnished = detect_furnished_text(f"{listing.get('furnishing', '')} {facilities}")
+    if furnished:
+        details["furnished"] = furnished
+    return details
+
+
+def parse_detail_page(html: str) -> Dict:
+    """
+    Furnished status, floor area (m²), BER and description from a listing page.
+
+    Embedded JSON is used where the site has it, then the page text. Fields the
+    page does not show are None.
+    """
+    details = {"furnished": None, "floor_area_sqm": None, "ber": None, "description": None}
+    details.update(_embedded_details(html))
+
+    soup = make_soup(html)
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = soup.get_text(" ", strip=True)
+
+    if details["description"] is None:
+        for selector in DESCRIPTION_SELECTORS:
+            element = soup.select_one(selector)
+            if element and element.get_text(strip=True):
+                details["description"] = element.get_text(" ", strip=True)
+                break
+        else:
+            meta = soup.find("meta", attrs={"name": "description"}) or soup.find("meta", attrs={"property": "og:description"})
+            if meta and meta.get("content"):
+                details["description"] = meta["content"].strip()
+
+    if details["furnished"] is None:
+        details["furnished"] = detect_furnished_text(text)
+    if details["floor_area_sqm"] is None:
+        details["floor_area_sqm"] = parse_floor_area(text)
+    if details["ber"] is None:
+        details["ber"] = parse_ber(text, html)
+    if details["description"]:
+        details["description"] = details["description"][:MAX_DESCRIPTION]
+    return details
+
+
+class DetailEnricher:
+    """
+    Fetches listing detail pages and extracts the fields search cards lack.
+
+    Only the listings handed in are fetched (utils/main.py passes new and
+    changed ones), through the crawl engine so each host keeps its rate limit
+    and at most `concurrency` pages are in flight. Pages go through the page
+    cache, so a listing re-enriched within the cache TTL costs no request.
+    """
+
+    def __init__(self, config: dict, crawl_engine: CrawlEngine = None, page_cache=None, concurrency: int = 4):
+        self.config = config
+        self.engine = crawl_engine or CrawlEngine.from_config(config)
+        self.page_cache = page_cache
+        self.concurrency = concurrency
+        self.http = HttpFetcher(cache=page_cache, pool_size=concurrency)
+        for source in ("property_ie", "myhome_ie", "daft_ie"):
+            if source in config:
+                self.engine.configure_site(config[source])
+
+    def detail_url(self, listing: Dict) -> str:
+        """Absolute URL of a listing (daft.ie cards link relative paths)"""
+        site = self.config.get(listing["source"].replace(".", "_")) or {}
+        return urljoin(site.get("website", {}).get("base_url", ""), listing["url"])
+
+    def _throttle_url(self, listing: Dict) -> Optional[str]:
+        url = self.detail_url(listing)
+        if self.page_cache and self.page_cache.is_fresh(url):
+            return None
+        return url
+
+    def _enrich_one(self, listing: Dict) -> Optional[Dict]:
+        html = self.http.get(self.detail_url(listing))
+        if html is None:
+            return None
+        details = parse_detail_page(html)
+        details["url"] = listing["url"]
+        return details
+
+    def enrich(self, listings: List[Dict]) -> List[Dict]:
+        """Details for each listing whose page could be fetched; failures are retried next run"""
+        results = self.engine.map(self._enrich_one, listings, self._throttle_url, concurrency=self.concurrency)
+        enriched = []
+        for listing, result in zip(listings, results):
+            if isinstance(result, Exception):
+                print(f"[ENRICH] {listing['url']} failed: {result}")
+            elif result is not None:
+                enriched.append(result)
+        return enriched
+
+    def close(self):
+        self.http.close()
@@ -0,0 +1,70 @@
+# http_fetcher.py
+from typing import Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IE,en;q=0.9",
+}
+
+
+class HttpFetcher:
+    """Keep-alive HTTP client for search pages that render without JavaScript"""
+
+    def __init__(self, timeout: int = 15, pool_size: int = 10, cache=None):
+        self.timeout = timeout
+        self.cache = cache  # optional PageCache shared across runs
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+
+        # One pooled adapter per scheme so connections are reused across pages
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str) -> Optional[str]:
+        """Return page HTML (from cache when fresh), or None if the request failed"""
+        return self.fetch(url)[0]
+
+    def fetch(self, url: str) -> Tuple[Optional[str], bool]:
+        """
+        Like get(), also telling whether the HTML came from the cache without
+        a request (a 304 revalidation still counts as a request).
+        """
+        cached = self.cache.get(url) if self.cache else None
+        if cached and cached["fresh"]:
+            return cached["body"], True
+
+        # Revalidate stale entries instead of downloading them again
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            response = self.session.get(url, timeout=self.timeout, headers=headers)
+        except requests.RequestException as e:
+            print(f"[HTTP] Request failed for {url}: {e}")
+            return None, False
+
+        if response.status_code == 304 and cached:
+            self.cache.refresh(url)
+            return cached["body"], False
+
+        if response.status_code != 200:
+            print(f"[HTTP] {url} returned status {response.status_code}")
+            return None, False
+
+        if self.cache:
+            self.cache.put(url, response.text,
+                           etag=response.headers.get("ETag"),
+                           last_modified=response.headers.get("Last-Modified"))
+        return response.text, False
+
+    def close(self):
+        self.session.close()
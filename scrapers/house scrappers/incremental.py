@@ -0,0 +1,66 @@
+# incremental.py
+from typing import Dict, List, Optional
+
+
+# Fields compared against the database to decide whether a listing changed
+FINGERPRINT_FIELDS = ("address", "rent_eur", "summary", "beds", "baths", "furnished")
+FURNISHED_INDEX = FINGERPRINT_FIELDS.index("furnished")
+
+
+def listing_fingerprint(listing: Dict) -> tuple:
+    return tuple(listing.get(field) for field in FINGERPRINT_FIELDS)
+
+
+class IncrementalTracker:
+    """
+    Filters scraped pages down to new or changed listings and decides when to stop.
+
+    With newest-first search results, once `stop_after` pages in a row hold
+    nothing new or changed, the rest of the result list is already in the database.
+    With stop_after=None (results in no particular order) it only filters.
+    """
+
+    def __init__(self, known: Dict[str, tuple], stop_after: Optional[int] = 2):
+        self.known = known
+        self.stop_after = stop_after
+        self.unchanged_pages = 0
+        self.fresh_count = 0
+
+    def is_new_or_changed(self, listing: Dict) -> bool:
+        known = self.known.get(listing["url"])
+        if known is None:
+            return True
+        if listing.get("furnished") == "Unknown":
+            # Cards without furnishing info keep the status enriched from the detail page
+            listing = dict(listing, furnished=known[FURNISHED_INDEX])
+        return known != listing_fingerprint(listing)
+
+    def filter(self, page_listings: List[Dict]) -> List[Dict]:
+        """Return the new/changed listings of one page and update the stop counter"""
+        fresh = [listing for listing in page_listings if self.is_new_or_changed(listing)]
+        self.unchanged_pages = 0 if fresh else self.unchanged_pages + 1
+        self.fresh_count += len(fresh)
+        return fresh
+
+    @property
+    def stops_early(self) -> bool:
+        return self.stop_after is not None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.stops_early and self.unchanged_pages >= self.stop_after
+
+
+def make_tracker(site_config: dict, known_listings: Optional[Dict[str, tuple]]) -> Optional[IncrementalTracker]:
+    """
+    Build a tracker from the site's incremental config, or None for a full crawl.
+
+    Early stopping needs a newest-first incremental.search_path; sites without
+    one have every page crawled and only filtered.
+    """
+    if known_listings is None:
+        return None
+    incremental = site_config.get("incremental") or {}
+    if not incremental.get("search_path"):
+        return IncrementalTracker(known_listings, stop_after=None)
+    return IncrementalTracker(known_listings, incremental.get("stop_after_unchanged_pages", 2))
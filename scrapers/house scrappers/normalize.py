@@ -0,0 +1,158 @@
+# normalize.py
+import re
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+# Compiled once and applied to whole columns instead of once per card
+RENT_PATTERN = re.compile(r'€([\d,]+)')
+MONTHLY_PATTERN = re.compile(r'month|/m|pm')
+WEEKLY_PATTERN = re.compile(r'week|/w|pw')
+PAREN_BEDS_PATTERN = re.compile(r'\((\d+)\s*(?:single|double|bed)')
+BEDS_PATTERN = re.compile(r'(\d+)\s*bed')
+BATHS_PATTERN = re.compile(r'(\d+)\s*bath')
+WEEKS_PER_MONTH = 52 / 12
+
+LISTING_FIELDS = ["source", "address", "url", "rent_eur", "rent_period", "original_rent",
+                  "summary", "beds", "baths", "furnished"]
+
+
+def _lower(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df:
+        return pd.Series("", index=df.index)
+    return df[column].fillna("").astype(str).str.lower()
+
+
+def _extract_int(text: pd.Series, pattern: re.Pattern) -> pd.Series:
+    return pd.to_numeric(text.str.extract(pattern, expand=False), errors="coerce").astype("Int64")
+
+
+def parse_rent(price_text: pd.Series, default_period: str = "monthly") -> pd.DataFrame:
+    """
+    Rent columns from raw price text.
+
+    Prices marked weekly are converted to monthly (x 52/12). Unmarked prices
+    fall back to `default_period`.
+    """
+    price = price_text.fillna("").astype(str).str.lower()
+    rent = pd.to_numeric(price.str.extract(RENT_PATTERN, expand=False).str.replace(",", "", regex=False),
+                         errors="coerce").astype("Int64")
+
+    monthly = price.str.contains(MONTHLY_PATTERN)
+    if default_period == "weekly":
+        weekly = ~monthly
+    else:
+        weekly = price.str.contains(WEEKLY_PATTERN) & ~monthly
+
+    return pd.DataFrame({
+        "rent_eur": to_monthly(rent, weekly),
+        "rent_period": np.where(weekly, "weekly", "monthly"),
+        "original_rent": rent,
+    }, index=price_text.index)
+
+
+def to_monthly(rent: pd.Series, weekly: pd.Series) -> pd.Series:
+    converted = np.rint(rent.astype("Float64") * WEEKS_PER_MONTH).astype("Int64")
+    return rent.where(~weekly, converted)
+
+
+def parse_beds(text: pd.Series) -> pd.Series:
+    """Bed count: '(2 double bedrooms)' first, then studio, then 'N bed'. Defaults to 1."""
+    beds = _extract_int(text, PAREN_BEDS_PATTERN)
+    beds = beds.where(beds.notna() | ~text.str.contains("studio", regex=False), 1)
+    return _at_least_one(beds.fillna(_extract_int(text, BEDS_PATTERN)))
+
+
+def parse_baths(text: pd.Series) -> pd.Series:
+    return _at_least_one(_extract_int(text, BATHS_PATTERN))
+
+
+def _at_least_one(counts: pd.Series) -> pd.Series:
+    return counts.where(counts.notna() & (counts > 0), 1).astype("Int64")
+
+
+def detect_furnished(text: pd.Series) -> pd.Series:
+    return pd.Series(np.select(
+        [
+            text.str.contains("unfurnished", regex=False),
+            text.str.contains("partially furnished", regex=False) | text.str.contains("part-furnished", regex=False),
+            text.str.contains("furnished", regex=False),
+        ],
+        ["No", "Partially", "Yes"],
+        default="Unknown",
+    ), index=text.index)
+
+
+def normalize_frame(raw: pd.DataFrame, default_period: str = "monthly") -> pd.DataFrame:
+    """
+    Normalize a batch of raw card fields into listing columns.
+
+    Expects source, address, url, summary and price_text, plus optional
+    beds_text, baths_text and furnished_text (missing text columns default to
+    summary, except furnished_text which defaults to empty).
+    """
+    summary = raw["summary"].fillna("").astype(str)
+    beds_text = _lower(raw, "beds_text") if "beds_text" in raw else summary.str.lower()
+    baths_text = _lower(raw, "baths_text") if "baths_text" in raw else summary.str.lower()
+
+    out = pd.DataFrame({
+        "source": raw["source"],
+        "address": raw["address"],
+        "url": raw["url"],
+    }, index=raw.index)
+    out = out.join(parse_rent(raw["price_text"], default_period))
+    out["summary"] = summary
+    out["beds"] = parse_beds(beds_text)
+    out["baths"] = parse_baths(baths_text)
+    out["furnished"] = detect_furnished(_lower(raw, "furnished_text"))
+    return out[LISTING_FIELDS]
+
+
+def to_records(df: pd.DataFrame) -> List[Dict]:
+    """DataFrame rows as plain dicts with Python ints and None for missing values"""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def normalize_listings(raw_rows: List[Dict], default_period: str = "monthly") -> List[Dict]:
+    """Normalize a page (or any batch) of raw card dicts into listing dicts"""
+    if not raw_rows:
+        return []
+    return to_records(normalize_frame(pd.DataFrame(raw_rows), default_period))
+
+
+def renormalize_frame(rentals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Re-derive normalized columns for stored rentals rows.
+
+    The raw price text is not stored, so rent_eur is recomputed from
+    original_rent and rent_period. Beds, baths and furnished are re-parsed
+    from summary and keep their stored value where the summary has no match.
+    Returns only the rows that changed.
+    """
+    summary = rentals["summary"].fillna("").astype(str).str.lower()
+    original = pd.to_numeric(rentals["original_rent"], errors="coerce").round().astype("Int64")
+    stored_rent = pd.to_numeric(rentals["rent_eur"], errors="coerce").round().astype("Int64")
+
+    out = rentals.copy()
+    out["rent_eur"] = to_monthly(original, rentals["rent_period"] == "weekly").fillna(stored_rent)
+
+    paren = _extract_int(summary, PAREN_BEDS_PATTERN)
+    beds = paren.where(paren.notna() | ~summary.str.contains("studio", regex=False), 1)
+    beds = beds.fillna(_extract_int(summary, BEDS_PATTERN))
+    out["beds"] = beds.where(beds.isna() | (beds > 0), 1).fillna(rentals["beds"].astype("Int64"))
+    out["baths"] = _extract_int(summary, BATHS_PATTERN).fillna(rentals["baths"].astype("Int64"))
+
+    furnished = detect_furnished(summary)
+    out["furnished"] = furnished.where(furnished != "Unknown", rentals["furnished"])
+
+    before = rentals[["rent_eur", "beds", "baths", "furnished"]].copy()
+    before["rent_eur"] = stored_rent
+    for column in ("beds", "baths"):
+        before[column] = pd.to_numeric(before[column], errors="coerce").astype("Int64")
+    changed = pd.Series(False, index=rentals.index)
+    for column in before.columns:
+        same = (before[column] == out[column]).fillna(False) | (before[column].isna() & out[column].isna())
+        changed |= ~same
+    return out[changed]
@@ -0,0 +1,50 @@
+# page_archive.py
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator
+
+
+class PageArchive:
+    """
+    Append-only record of raw search-page HTML for offline replay.
+
+    Each crawl writes one gzipped JSON-lines file per source
+    (archive_dir/<source>/<timestamp>.jsonl.gz), one record per page.
+    """
+
+    def __init__(self, archive_dir: str):
+        self.archive_dir = archive_dir
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def record(self, source: str, url: str, html: str):
+        line = json.dumps({"source": source, "url": url, "fetched_at": time.time(), "html": html})
+        with self._lock:
+            f = self._files.get(source)
+            if f is None:
+                folder = os.path.join(self.archive_dir, source)
+                os.makedirs(folder, exist_ok=True)
+                f = gzip.open(os.path.join(folder, f"{self.run_id}.jsonl.gz"), "at", encoding="utf-8")
+                self._files[source] = f
+            f.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+
+def iter_archive(archive_dir: str, source: str = None) -> Iterator[Dict]:
+    """Yield archived page records source by source, oldest run first"""
+    pattern = os.path.join(archive_dir, source or "*", "*.jsonl.gz")
+    for path in sorted(glob.glob(pattern)):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
@@ -0,0 +1,127 @@
+# page_cache.py
+import glob
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class PageCache:
+    """
+    On-disk cache of fetched pages, addressed by the SHA-256 of the URL.
+
+    Each entry is a gzipped body plus a small JSON sidecar (url, fetched_at,
+    etag, last_modified). Entries younger than `ttl` seconds are served without
+    touching the network; older ones are kept for conditional revalidation.
+    The body file's mtime doubles as the LRU clock for size-based eviction.
+    """
+
+    def __init__(self, cache_dir: str, ttl: int = 21600, max_mb: int = 500):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(os.path.getsize(p) for p in self._body_files())
+
+    def _body_files(self):
+        return glob.glob(os.path.join(self.cache_dir, "*", "*.html.gz"))
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        folder = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(folder, key + ".html.gz"), os.path.join(folder, key + ".json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        Return the cached entry for `url`, or None.
+
+        The dict holds the sidecar fields plus "body" and "fresh" (within TTL).
+        """
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            with gzip.open(body_path, "rt", encoding="utf-8") as f:
+                entry["body"] = f.read()
+        except (OSError, ValueError):
+            return None
+
+        os.utime(body_path)  # mark as recently used
+        entry["fresh"] = time.time() - entry["fetched_at"] < self.ttl
+        return entry
+
+    def is_fresh(self, url: str) -> bool:
+        """True if `url` would be served from the cache without a network request"""
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return time.time() - json.load(f)["fetched_at"] < self.ttl
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def put(self, url: str, body: str, etag: str = None, last_modified: str = None):
+        body_path, meta_path = self._paths(url)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+
+        old_size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+        with gzip.open(body_path, "wt", encoding="utf-8") as f:
+            f.write(body)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "url": url,
+                "fetched_at": time.time(),
+                "etag": etag,
+                "last_modified": last_modified,
+            }, f)
+
+        with self._lock:
+            self._total_bytes += os.path.getsize(body_path) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def refresh(self, url: str):
+        """Restart the TTL of an entry the server confirmed unchanged (HTTP 304)"""
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            meta["fetched_at"] = time.time()
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        except (OSError, ValueError):
+            pass
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max size"""
+        entries = []
+        for body_path in self._body_files():
+            try:
+                stat = os.stat(body_path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, body_path))
+
+        target = self.max_bytes * 0.9
+        for _, size, body_path in sorted(entries):
+            if self._total_bytes <= target:
+                break
+            for path in (body_path, body_path[:-len(".html.gz")] + ".json"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            for body_path in self._body_files():
+                for path in (body_path, body_path[:-len(".html.gz")] + ".json"):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            self._total_bytes = 0
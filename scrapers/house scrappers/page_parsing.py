@@ -0,0 +1,32 @@
+# page_parsing.py
+import json
+import re
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+
+def make_soup(html: str) -> BeautifulSoup:
+    """Parse a whole page once, with lxml when it is installed"""
+    return BeautifulSoup(html, PARSER)
+
+
+# Next.js pages ship their server-side props as one JSON blob
+NEXT_DATA_PATTERN = re.compile(r'<script[^>]*\bid="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+
+
+def load_next_data(html: str) -> Optional[dict]:
+    """Decode the page's __NEXT_DATA__ script, or None if it has none (or it is not valid JSON)"""
+    match = NEXT_DATA_PATTERN.search(html)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
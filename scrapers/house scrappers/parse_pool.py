@@ -0,0 +1,57 @@
+# parse_pool.py
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+
+# One parser instance per (scraper class, config) in each worker process
+_parsers = {}
+
+
+def _parse_in_worker(scraper_class, config_path: str, html: str):
+    key = (scraper_class, config_path)
+    parser = _parsers.get(key)
+    if parser is None:
+        # Config only: no crawl engine, metrics or nested parse pool in the worker
+        parser = _parsers[key] = scraper_class(config_path, parse_only=True)
+    start = time.perf_counter()
+    card_count, listings = parser.parse_html(html)
+    return card_count, listings, time.perf_counter() - start
+
+
+class ParsePool:
+    """
+    Process pool that turns raw search-page HTML into listings.
+
+    Fetchers submit HTML and carry on with the next request while parsing
+    runs on other cores. Results come back as futures of
+    (cards found, listings, parse seconds).
+    """
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def submit(self, scraper, html: str) -> Future:
+        return self.executor.submit(_parse_in_worker, type(scraper), scraper.config_path, html)
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def parse_inline(scraper, html: str) -> Future:
+    """Parse on the calling thread, wrapped in a finished future (no pool configured)"""
+    future = Future()
+    try:
+        start = time.perf_counter()
+        card_count, listings = scraper.parse_html(html)
+        future.set_result((card_count, listings, time.perf_counter() - start))
+    except Exception as e:
+        future.set_exception(e)
+    return future
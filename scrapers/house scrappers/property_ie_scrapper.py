@@ -1,198 +1,200 @@
 # property_ie_scraper.py
-import yaml
 import re
-import time
-from typing import List, Dict, Set
+import threading
+from typing import Iterator, List, Dict, Optional, Tuple
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-
-
-class PropertyIEScraper:
-    def __init__(self, config_path: str = "D:/Live Labor-Housing Mismatch Index 2025 (Dublin)/config.yaml"):
-        self.config = self._load_config(config_path)
-        self.driver = None
-        self.wait = None
-        self.seen_urls: Set[str] = set()
-        self._init_driver()
-
-    def _load_config(self, path: str) -> dict:
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)["property_ie"]
-
-    def _init_driver(self):
-        options = Options()
-        if self.config["scraper"]["headless"]:
-            options.add_argument("--headless")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
-        self.wait = WebDriverWait(self.driver, self.config["scraper"]["timeout"])
+from normalize import normalize_listings
+from base_scraper import BaseScraper
 
-    def _get_page_url(self, page: int) -> str:
-        base = self.config["website"]["base_url"]
-        path = self.config["website"]["search_path"]
-        path = re.sub(r'/p_\d+/', f'/p_{page}/', path)
-        return base + path
-
-    def _detect_furnished(self, text: str) -> str:
-        t = text.lower()
-        if "unfurnished" in t:
-            return "No"
-        elif "partially furnished" in t or "part-furnished" in t:
-            return "Partially"
-        elif "furnished" in t:
-            return "Yes"
-        else:
-            return "Unknown"
-
-    def _get_last_page(self) -> int:
-        """Detect last page from div#pages — even in '..' section."""
-        try:
-            pagination = self.driver.find_element(By.CSS_SELECTOR, "div#pages")
-            links = pagination.find_elements(By.CSS_SELECTOR, "a")
-
-            max_page = 1
-            for link in links:
-                href = link.get_attribute("href") or ""
-                text = link.text.strip()
-
-                # 1. Extract from URL: /p_44/
-                match = re.search(r'/p_(\d+)/', href)
-                if match:
-                    page_num = int(match.group(1))
-                    if page_num > max_page:
-                        max_page = page_num
-
-                # 2. Fallback: visible number
-                elif text.isdigit():
-                    page_num = int(text)
-                    if page_num > max_page:
-                        max_page = page_num
-
-            print(f"[PAGINATION] Detected last page: {max_page}")
-            return max_page
-
-        except NoSuchElementException:
-            print("[PAGINATION] No pagination found. Assuming page 1 only.")
-            return 1
-
-    def scrap_all_pages(self) -> List[Dict]:
-        """Scrape ALL listings from page 1 to last."""
-        all_listings = []
-        page = 1
 
-        while True:
-            url = self._get_page_url(page)
-            print(f"\n[PAGE {page}] Loading: {url}")
+class PropertyIEScraper(BaseScraper):
+    SOURCE = "property.ie"
+    CONFIG_SECTION = "property_ie"
+    CARD_SELECTOR = ".search_result"
 
-            try:
-                self.driver.get(url)
-                self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".search_result")))
-                time.sleep(self.config["scraper"]["delay"])
-            except TimeoutException:
-                print(f"[ERROR] Page {page} timed out. Stopping.")
-                break
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._driver_lock = threading.Lock()
 
-            cards = self.driver.find_elements(By.CSS_SELECTOR, ".search_result")
-            if not cards:
-                print(f"[INFO] No listings on page {page}. Stopping.")
-                break
+    def _acquire_driver(self) -> webdriver.Chrome:
+        """Lease a browser from the shared pool, or lock the scraper's own one (pages load concurrently)"""
+        if self.driver_pool:
+            driver = self.driver_pool.acquire()
+            self._apply_profile(driver)
+            return driver
 
-            print(f"[PAGE {page}] Found {len(cards)} listings")
+        self._driver_lock.acquire()
+        try:
+            if self.driver is None:
+                self._init_driver()
+        except BaseException:
+            # Chrome failed to start: let the other page workers try instead of blocking forever
+            self._driver_lock.release()
+            raise
+        return self.driver
+
+    def _return_driver(self, driver):
+        if self.driver_pool:
+            self.driver_pool.release(driver)
+        else:
+            self._driver_lock.release()
 
-            page_listings = self._parse_page(cards)
-            new_count = 0
-            for listing in page_listings:
-                if listing["url"] not in self.seen_urls:
-                    self.seen_urls.add(listing["url"])
-                    all_listings.append(listing)
-                    new_count += 1
-            print(f"[PAGE {page}] Added {new_count} new listings")
+    def _get_page_url(self, page: int) -> str:
+        path = re.sub(r'/p_\d+/', f'/p_{page}/', self._search_path())
+        return self.config["website"]["base_url"] + path
 
-            last_page = self._get_last_page()
-            if page == 1:
-                print(f"[INFO] Total pages to scrape: {last_page}")
+    def _get_last_page(self, soup: BeautifulSoup) -> int:
+        """Detect last page from div#pages — even in '..' section."""
+        pagination = soup.select_one("div#pages")
+        if not pagination:
+            print("[PAGINATION] No pagination found. Assuming page 1 only.")
+            return 1
 
-            if page >= last_page:
-                print(f"[DONE] Reached last page ({page}).")
+        max_page = 1
+        for link in pagination.select("a"):
+            href = link.get("href") or ""
+            text = link.get_text(strip=True)
+
+            # 1. Extract from URL: /p_44/
+            match = re.search(r'/p_(\d+)/', href)
+            if match:
+                max_page = max(max_page, int(match.group(1)))
+
+            # 2. Fallback: visible number
+            elif text.isdigit():
+                max_page = max(max_page, int(text))
+
+        print(f"[PAGINATION] Detected last page: {max_page}")
+        return max_page
+
+    def _load_page(self, page: int) -> Optional[Tuple[List[Dict], int]]:
+        """Fetch and parse one search page. Returns (listings, last_page), or None if the page failed."""
+        url = self._get_page_url(page)
+        print(f"\n[PAGE {page}] Loading: {url}")
+        result = self._load_search_page(page, url, empty_is_failure=True)
+        if result is None:
+            print(f"[ERROR] Page {page} timed out.")
+            return None
+
+        soup, card_count, listings = result
+        if not card_count:
+            print(f"[INFO] No listings on page {page}.")
+            return None
+        print(f"[PAGE {page}] Found {card_count} listings")
+        return listings, self._get_last_page(soup)
+
+    def iter_pages(self) -> Iterator[List[Dict]]:
+        """Scrape ALL pages from page 1 to last, yielding each page's new listings as it is parsed."""
+        total = 0
+        progress = self.progress
+
+        if progress.resumed and progress.last_page:
+            last_page = progress.last_page
+            print(f"[RESUME] Continuing at {progress.describe()}")
+        else:
+            self.engine.throttle(self._throttle_url(self._get_page_url(1)))
+            result = self._load_page(1)
+            if result is None:
+                print("[ERROR] First page failed. Stopping.")
+                return
+
+            page_listings, last_page = result
+            progress.last_page = last_page
+            progress.page_done(1)
+            batch = self._merge_page(1, page_listings)
+            total += len(batch)
+            yield batch
+            print(f"[INFO] Total pages to scrape: {last_page}")
+
+        # Incremental runs that can stop early stay serial so they stop at the first run of unchanged pages
+        concurrency = self.config["scraper"].get("concurrency", 1)
+        if concurrency > 1 and last_page > 1 and not (self.incremental and self.incremental.stops_early):
+            pages = self._iter_pages_concurrently(last_page, concurrency)
+        else:
+            pages = self._iter_pages_serially(last_page)
+        for batch in pages:
+            total += len(batch)
+            yield batch
+
+        print(f"\n[FINAL] Total unique listings scraped: {total}")
+
+    def _iter_pages_serially(self, last_page: int) -> Iterator[List[Dict]]:
+        """Crawl one page at a time (pages left failed by a resumed run first), stopping at the first failure."""
+        progress = self.progress
+        for page in list(progress.frontier):
+            self.engine.throttle(self._throttle_url(self._get_page_url(page)))
+            result = self._load_page(page)
+            if result is None:
+                print(f"[ERROR] Page {page} failed. Stopping.")
+                return
+            progress.page_done(page)
+            yield self._merge_page(page, result[0])
+
+        page = progress.next_page - 1
+        while page < last_page:
+            if self._incremental_exhausted():
                 break
-
             page += 1
-            time.sleep(1)
-
-        print(f"\n[FINAL] Total unique listings scraped: {len(all_listings)}")
-        return all_listings
+            self.engine.throttle(self._throttle_url(self._get_page_url(page)))
+
+            result = self._load_page(page)
+            if result is None:
+                print(f"[ERROR] Page {page} failed. Stopping.")
+                return
+
+            page_listings, last_page = result
+            progress.last_page = last_page
+            progress.page_done(page)
+            yield self._merge_page(page, page_listings)
+
+        progress.complete = True
+        print(f"[DONE] Reached last page ({page}).")
+
+    def _iter_pages_concurrently(self, last_page: int, concurrency: int) -> Iterator[List[Dict]]:
+        """Fan the remaining pages out to the crawl engine, yielding results in page order."""
+        progress = self.progress
+        pages = list(progress.frontier) + list(range(max(progress.next_page, 2), last_page + 1))
+        print(f"[INFO] Crawling {len(pages)} pages with {concurrency} workers")
+
+        # Work through the pages in windows so finished pages flow out before the whole crawl is done.
+        # Results come back in page order, so dedup keeps the serial crawl's first-seen listing.
+        window = concurrency * 2
+        for i in range(0, len(pages), window):
+            chunk = pages[i:i + window]
+            results = self.engine.map(self._load_page, chunk,
+                                      url_for=lambda page: self._throttle_url(self._get_page_url(page)),
+                                      concurrency=concurrency)
+            for page, result in zip(chunk, results):
+                if result is None or isinstance(result, Exception):
+                    print(f"[WARN] Page {page} failed. Skipping. {result or ''}")
+                    progress.page_failed(page)
+                    continue
+                progress.page_done(page)
+                yield self._merge_page(page, result[0])
+
+        # Skipped pages stay in the frontier for the next --resume
+        progress.complete = not progress.frontier
+        print(f"[DONE] Reached last page ({last_page}).")
 
     def _parse_page(self, cards) -> List[Dict]:
-        listings = []
+        """Parse BeautifulSoup cards from one search page"""
+        raw_rows = []
         for i, card in enumerate(cards, 1):
             try:
-                data = {
-                    "source": "property.ie",
-                }
-
-                addr_elem = card.find_element(By.CSS_SELECTOR, ".sresult_address h2 a")
-                data["address"] = addr_elem.text.strip()
-                data["url"] = addr_elem.get_attribute("href")
-
-                rent_text = card.find_element(By.CSS_SELECTOR, ".sresult_description h3").text.strip()
-                rent_match = re.search(r'€([\d,]+)', rent_text)
-                rent_value = int(rent_match.group(1).replace(',', '')) if rent_match else None
-
-                # Check if rent is weekly or monthly
-                rent_lower = rent_text.lower()
-                if 'monthly' in rent_lower:
-                    data["rent_eur"] = rent_value
-                    data["rent_period"] = "monthly"
-                    data["original_rent"] = rent_value
-                else:
-                    # Assume weekly if not explicitly monthly, convert to monthly
-                    data["rent_period"] = "weekly"
-                    data["original_rent"] = rent_value
-                    data["rent_eur"] = round(rent_value * (52 / 12)) if rent_value else None
-
-                summary = card.find_element(By.CSS_SELECTOR, ".sresult_description h4").text.strip()
-                data["summary"] = summary
-                lower_summary = summary.lower()
-
-                # BEDS
-                paren_match = re.search(r'\((\d+)\s*(single|double|bed)', lower_summary)
-                if paren_match:
-                    data["beds"] = int(paren_match.group(1))
-                elif "studio" in lower_summary:
-                    data["beds"] = 1
-                else:
-                    beds_match = re.search(r'(\d)\s*bedroom', summary, re.I)
-                    data["beds"] = int(beds_match.group(1)) if beds_match else 1
-
-                # BATHS — default 1
-                baths_match = re.search(r'(\d)\s*bathroom', summary, re.I)
-                data["baths"] = int(baths_match.group(1)) if baths_match else 1
-
-                data["furnished"] = self._detect_furnished(summary)
-
-                listings.append(data)
+                addr_elem = card.select_one(".sresult_address h2 a")
+                summary = card.select_one(".sresult_description h4").get_text(" ", strip=True)
+                raw_rows.append({
+                    "source": self.SOURCE,
+                    "address": addr_elem.get_text(" ", strip=True),
+                    "url": urljoin(self.config["website"]["base_url"], addr_elem["href"]),
+                    "price_text": card.select_one(".sresult_description h3").get_text(" ", strip=True),
+                    "summary": summary,
+                    "furnished_text": summary,
+                })
             except Exception as e:
                 print(f"  [WARN] Failed card {i}: {e}")
                 continue
-        return listings
-
-    def run(self) -> List[Dict]:
-        listings = self.scrap_all_pages()
-        self.driver.quit()
-        return listings
-
-    def __del__(self):
-        if hasattr(self, 'driver') and self.driver:
-            self.driver.quit()
\ No newline at end of file
+        # property.ie only marks monthly prices; anything else is per week
+        return normalize_listings(raw_rows, default_period="weekly")
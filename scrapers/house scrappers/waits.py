@@ -0,0 +1,32 @@
+# waits.py
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+
+def wait_for_listings(driver, selector: str, timeout: float, max_settle: float, poll: float = 0.25) -> int:
+    """
+    Wait until listing cards matching `selector` are present and their count is stable.
+
+    Returns as soon as two consecutive polls see the same number of cards, so a
+    fast page costs one poll interval instead of a fixed sleep. `max_settle` caps
+    the time spent waiting for lazily appended cards after the first one appears.
+
+    Raises:
+        TimeoutException: no card appeared within `timeout` seconds
+    """
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+    )
+
+    deadline = time.monotonic() + max_settle
+    count = len(driver.find_elements(By.CSS_SELECTOR, selector))
+    while time.monotonic() < deadline:
+        time.sleep(poll)
+        new_count = len(driver.find_elements(By.CSS_SELECTOR, selector))
+        if new_count == count:
+            break
+        count = new_count
+
+    return count
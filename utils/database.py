@@ -1,12 +1,235 @@
+import json
+import queue
+import re
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import os
 
 
+# Pragmas applied to every connection. WAL lets the app read while a scrape
+# writes; busy_timeout makes a connection wait for a lock instead of failing
+# straight away with "database is locked".
+CONNECTION_PRAGMAS = {
+    'busy_timeout': 10000,       # ms
+    'cache_size': -65536,        # KiB (64 MB page cache)
+    'mmap_size': 268435456,      # bytes (256 MB memory-mapped reads)
+    'temp_store': 'MEMORY',
+}
+# Writer only: journal mode is stored in the database file, so readers inherit WAL
+WRITER_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',     # safe with WAL; fsync at checkpoints instead of every commit
+}
+
+
+def _apply_pragmas(conn: sqlite3.Connection, pragmas: Dict):
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+def connect(db_path: str, read_only: bool = False, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Open a tuned connection to the rentals database.
+
+    The writer switches the file to WAL; read-only connections open it with
+    mode=ro so they can never take the write lock.
+    """
+    if read_only:
+        uri = 'file:' + os.path.abspath(db_path).replace('?', '%3f').replace('#', '%23') + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, timeout=CONNECTION_PRAGMAS['busy_timeout'] / 1000,
+                               check_same_thread=check_same_thread)
+    else:
+        conn = sqlite3.connect(db_path, timeout=CONNECTION_PRAGMAS['busy_timeout'] / 1000,
+                               check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row  # Enable column access by name
+    _apply_pragmas(conn, CONNECTION_PRAGMAS)
+    if read_only:
+        conn.execute('PRAGMA query_only = ON')
+    else:
+        _apply_pragmas(conn, WRITER_PRAGMAS)
+    return conn
+
+
+# name -> indexed columns, created by RentalDatabase for search_listings()
+SEARCH_INDEXES = {
+    'idx_rent': 'rent_eur, beds, baths, furnished',
+    'idx_source_rent': 'source, rent_eur',
+    'idx_beds_rent': 'beds, rent_eur',
+    'idx_furnished_rent': 'furnished, rent_eur',
+    'idx_updated': 'updated_at',
+}
+
+# sort option -> (column, direction); id breaks ties so keyset cursors are exact
+SEARCH_SORTS = {
+    'rent_asc': ('rent_eur', 'ASC'),
+    'rent_desc': ('rent_eur', 'DESC'),
+    'newest': ('updated_at', 'DESC'),
+}
+
+SEARCH_COLUMNS = '''id, source, address, url, rent_eur, rent_period, original_rent, summary, beds, baths,
+                    furnished, floor_area_sqm, ber, scraped_at, updated_at,
+                    COALESCE(canonical_id, id) AS canonical_id'''
+
+
+FTS_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def fts_query(text: str, columns: str = None) -> Optional[str]:
+    """
+    FTS5 MATCH expression for free text: every word must match as a prefix
+    ("rath 6" finds "Rathmines, Dublin 6"). Words are quoted, so user input
+    cannot inject FTS syntax. Returns None if the text has no words.
+    """
+    terms = ' '.join(f'"{token}"*' for token in FTS_TOKEN_PATTERN.findall(text or ''))
+    if not terms:
+        return None
+    return f'{{{columns}}} : ({terms})' if columns else terms
+
+
+def _escape_like(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _search_where(column: str, min_rent: float = None, max_rent: float = None, beds: int = None,
+                  min_beds: int = None, baths: int = None, min_baths: int = None, furnished: str = None,
+                  source: str = None, location: str = None, keywords: str = None, summary_contains: str = None,
+                  unique: bool = False) -> Tuple[List[str], List]:
+    """WHERE clauses and parameters for the search filters, sorted by `column`"""
+    where, params = [], []
+
+    def add(clause, *values):
+        where.append(clause)
+        params.extend(values)
+
+    if min_rent is not None:
+        add('rent_eur >= ?', min_rent)
+    if max_rent is not None:
+        add('rent_eur <= ?', max_rent)
+    if column == 'rent_eur':
+        add('rent_eur IS NOT NULL')
+    if beds is not None:
+        add('beds = ?', beds)
+    if min_beds is not None:
+        add('beds >= ?', min_beds)
+    if baths is not None:
+        add('baths = ?', baths)
+    if min_baths is not None:
+        add('baths >= ?', min_baths)
+    if furnished is not None:
+        add('furnished = ?', furnished)
+    if source is not None:
+        add('source = ?', source)
+    for text, columns in ((location, 'address'), (keywords, 'address summary')):
+        match = fts_query(text, columns)
+        if match:
+            add('id IN (SELECT rowid FROM rentals_fts WHERE rentals_fts MATCH ?)', match)
+    # Substring matches cannot use an index; they are checked on rows the indexed filters leave
+    if summary_contains:
+        add("summary LIKE ? ESCAPE '\\'", f'%{_escape_like(summary_contains)}%')
+    if unique:
+        add('(canonical_id IS NULL OR canonical_id = id)')
+    return where, params
+
+
+def search_listings(conn: sqlite3.Connection, min_rent: float = None, max_rent: float = None, beds: int = None,
+                    min_beds: int = None, baths: int = None, min_baths: int = None, furnished: str = None,
+                    source: str = None, location: str = None, keywords: str = None, summary_contains: str = None,
+                    unique: bool = False,
+                    sort: str = 'rent_asc', limit: int = 50, after: tuple = None) -> Dict:
+    """
+    Filtered, sorted page of listings, evaluated in SQLite.
+
+    Filters left as None are not applied. location matches words in the
+    address and keywords words in the address or summary, both through the
+    FTS5 index. `after` is the `next` cursor of the
+    previous page (keyset pagination: no OFFSET, so every page costs the same).
+    Rent sorts leave out listings without a rent. With unique=True only the
+    canonical row of each cross-source duplicate cluster is returned.
+
+    Returns {'rows': [...], 'next': cursor for the following page or None}.
+    """
+    column, direction = SEARCH_SORTS[sort]
+    where, params = _search_where(column, min_rent=min_rent, max_rent=max_rent, beds=beds, min_beds=min_beds,
+                                  baths=baths, min_baths=min_baths, furnished=furnished, source=source,
+                                  location=location, keywords=keywords, summary_contains=summary_contains,
+                                  unique=unique)
+    if after is not None:
+        where.append(f'({column}, id) {">" if direction == "ASC" else "<"} (?, ?)')
+        params.extend(after)
+
+    sql = f"""
+        SELECT {SEARCH_COLUMNS}
+        FROM rentals
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY {column} {direction}, id {direction}
+        LIMIT ?
+    """
+    rows = [dict(row) for row in conn.execute(sql, params + [limit + 1]).fetchall()]
+
+    # One extra row tells whether another page exists
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1][column], rows[-1]['id'])
+    return {'rows': rows, 'next': next_cursor}
+
+
+def count_listings(conn: sqlite3.Connection, sort: str = 'rent_asc', **filters) -> int:
+    """Number of listings search_listings() pages through for the same filters and sort"""
+    where, params = _search_where(SEARCH_SORTS[sort][0], **filters)
+    sql = f"SELECT COUNT(*) FROM rentals {'WHERE ' + ' AND '.join(where) if where else ''}"
+    return conn.execute(sql, params).fetchone()[0]
+
+
+class ReadPool:
+    """
+    Pool of read-only connections for readers such as the Streamlit app.
+
+    In WAL mode readers see the last committed snapshot and never block the
+    scraper's writes (or get blocked by them). Connections can be used from any
+    thread, one lease at a time.
+    """
+
+    def __init__(self, db_path: str, size: int = 4):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(connect(db_path, read_only=True, check_same_thread=False))
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        conn = self._idle.get(timeout=timeout)
+        try:
+            yield conn
+        finally:
+            # End any open read transaction so the snapshot does not pin the WAL
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
 class RentalDatabase:
     """SQLite database for storing rental property listings"""
 
+    # Columns added after the first release, migrated in place on open
+    ADDED_COLUMNS = {
+        'canonical_id': 'INTEGER',
+        'floor_area_sqm': 'REAL',
+        'ber': 'TEXT',
+        'description': 'TEXT',
+        'enriched_at': 'TIMESTAMP',
+    }
+
     def __init__(self, db_path: str = None):
         if db_path is None:
             # Default to data/rentals.db
@@ -21,11 +244,14 @@ class RentalDatabase:
         self._create_tables()
 
     def _connect(self):
-        """Establish database connection"""
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row  # Enable column access by name
+        """Establish the writer connection (WAL, tuned pragmas, busy timeout)"""
+        self.conn = connect(self.db_path)
         self.cursor = self.conn.cursor()
 
+    def read_pool(self, size: int = 4) -> ReadPool:
+        """Read-only connections to this database, for readers running alongside this writer"""
+        return ReadPool(self.db_path, size)
+
     def _create_tables(self):
         """Create database tables if they don't exist"""
         self.cursor.execute('''
@@ -42,88 +268,247 @@ class RentalDatabase:
                 baths INTEGER,
                 furnished TEXT,
                 scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                canonical_id INTEGER,
+                floor_area_sqm REAL,
+                ber TEXT,
+                description TEXT,
+                enriched_at TIMESTAMP
             )
         ''')
 
-        # Create index on URL for faster duplicate checking
+        # Databases created before dedup and enrichment lack the newer columns
+        self.cursor.execute('PRAGMA table_info(rentals)')
+        existing = {row['name'] for row in self.cursor.fetchall()}
+        for column, column_type in self.ADDED_COLUMNS.items():
+            if column not in existing:
+                self.cursor.execute(f'ALTER TABLE rentals ADD COLUMN {column} {column_type}')
+
+        # Create index on canonical id for counting and grouping unique listings
         self.cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_url ON rentals(url)
+            CREATE INDEX IF NOT EXISTS idx_canonical_id ON rentals(canonical_id)
         ''')
 
-        # Create index on source for filtering
+        # url UNIQUE already has an index; (source, rent_eur) below covers source lookups
+        self.cursor.execute('DROP INDEX IF EXISTS idx_url')
+        self.cursor.execute('DROP INDEX IF EXISTS idx_source')
+
+        # Indexes for search(): each serves an equality filter plus the rent range and rent
+        # ordering (rowid = id rides along as the keyset tiebreaker). idx_rent carries the
+        # other filter columns so non-matching rows are skipped before any table lookup.
+        for name, columns in SEARCH_INDEXES.items():
+            self.cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON rentals({columns})')
+
+        # Crawl checkpoints: how far each source got, so an interrupted crawl can resume
         self.cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_source ON rentals(source)
+            CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+                source TEXT PRIMARY KEY,
+                next_page INTEGER NOT NULL,
+                last_page INTEGER,
+                frontier TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
         ''')
 
+        # Listing URLs already saved by the checkpointed crawl (its seen-URL set)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_seen_urls (
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (source, url)
+            )
+        ''')
+
+        self._create_history()
+        self._create_fts()
+
         self.conn.commit()
 
-    def insert_listing(self, listing: Dict) -> bool:
-        try:
-            self.cursor.execute('''
-                INSERT INTO rentals
-                (source, address, url, rent_eur, rent_period, original_rent,
-                 summary, beds, baths, furnished)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                listing.get('source'),
-                listing.get('address'),
-                listing.get('url'),
-                listing.get('rent_eur'),
-                listing.get('rent_period', 'monthly'),
-                listing.get('original_rent', listing.get('rent_eur')),
-                listing.get('summary'),
-                listing.get('beds'),
-                listing.get('baths'),
-                listing.get('furnished')
-            ))
-            self.conn.commit()
-            return True
-
-        except sqlite3.IntegrityError:
-            # URL already exists - update instead
-            self._update_listing(listing)
-            return False
-
-    def _update_listing(self, listing: Dict):
-        """Update existing listing with new data"""
+    def _create_fts(self):
+        """
+        FTS5 index over rentals.address and rentals.summary for keyword search.
+
+        It is an external-content table (the text lives only in rentals) kept
+        in sync by triggers. Prefix indexes for 2 and 3 characters keep
+        type-ahead queries fast.
+        """
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'rentals_fts'")
+        rebuild = self.cursor.fetchone() is None
+
         self.cursor.execute('''
-            UPDATE rentals
-            SET source = ?, address = ?, rent_eur = ?, rent_period = ?,
-                original_rent = ?, summary = ?, beds = ?, baths = ?,
-                furnished = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE url = ?
-        ''', (
-            listing.get('source'),
-            listing.get('address'),
-            listing.get('rent_eur'),
-            listing.get('rent_period', 'monthly'),
-            listing.get('original_rent', listing.get('rent_eur')),
-            listing.get('summary'),
-            listing.get('beds'),
-            listing.get('baths'),
-            listing.get('furnished'),
-            listing.get('url')
-        ))
-        self.conn.commit()
+            CREATE VIRTUAL TABLE IF NOT EXISTS rentals_fts USING fts5(
+                address, summary,
+                content = 'rentals', content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        ''')
+
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS rentals_fts_insert AFTER INSERT ON rentals
+            BEGIN
+                INSERT INTO rentals_fts (rowid, address, summary) VALUES (NEW.id, NEW.address, NEW.summary);
+            END
+        ''')
+
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS rentals_fts_delete AFTER DELETE ON rentals
+            BEGIN
+                INSERT INTO rentals_fts (rentals_fts, rowid, address, summary)
+                VALUES ('delete', OLD.id, OLD.address, OLD.summary);
+            END
+        ''')
+
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS rentals_fts_update AFTER UPDATE OF address, summary ON rentals
+            WHEN OLD.address IS NOT NEW.address OR OLD.summary IS NOT NEW.summary
+            BEGIN
+                INSERT INTO rentals_fts (rentals_fts, rowid, address, summary)
+                VALUES ('delete', OLD.id, OLD.address, OLD.summary);
+                INSERT INTO rentals_fts (rowid, address, summary) VALUES (NEW.id, NEW.address, NEW.summary);
+            END
+        ''')
+
+        if rebuild:
+            # Index listings stored before the FTS table existed
+            self.cursor.execute("INSERT INTO rentals_fts (rentals_fts) VALUES ('rebuild')")
+
+    def _create_history(self):
+        """
+        Append-only rent history: one row when a listing is first stored and one
+        per later change of a tracked field, written by triggers on rentals.
+
+        Upserts skip unchanged rows, so the table grows with changes, not with
+        runs. Furnished status is not tracked because enrichment fills it in.
+        """
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rent_history'")
+        backfill = self.cursor.fetchone() is None
+
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rent_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                rental_id INTEGER NOT NULL REFERENCES rentals(id),
+                observed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                rent_eur REAL,
+                previous_rent_eur REAL,
+                original_rent REAL,
+                rent_period TEXT,
+                summary TEXT,
+                beds INTEGER,
+                baths INTEGER
+            )
+        ''')
+
+        # A listing's trajectory in time order
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_history_rental ON rent_history(rental_id, observed_at)
+        ''')
+
+        # Only price drops are indexed, so "drops in the last N days" reads just those rows
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_history_drops ON rent_history(observed_at)
+            WHERE rent_eur < previous_rent_eur
+        ''')
+
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS rentals_history_insert AFTER INSERT ON rentals
+            BEGIN
+                INSERT INTO rent_history (rental_id, rent_eur, original_rent, rent_period, summary, beds, baths)
+                VALUES (NEW.id, NEW.rent_eur, NEW.original_rent, NEW.rent_period, NEW.summary, NEW.beds, NEW.baths);
+            END
+        ''')
+
+        # Only updates that bump updated_at are changes seen on the site; re-normalizing
+        # stored rows leaves it alone and is not recorded. Recreated so older databases get the rule.
+        self.cursor.execute('DROP TRIGGER IF EXISTS rentals_history_update')
+        self.cursor.execute('''
+            CREATE TRIGGER rentals_history_update
+            AFTER UPDATE OF rent_eur, original_rent, rent_period, summary, beds, baths ON rentals
+            WHEN NEW.updated_at IS NOT OLD.updated_at
+             AND (OLD.rent_eur IS NOT NEW.rent_eur OR OLD.original_rent IS NOT NEW.original_rent
+              OR OLD.rent_period IS NOT NEW.rent_period OR OLD.summary IS NOT NEW.summary
+              OR OLD.beds IS NOT NEW.beds OR OLD.baths IS NOT NEW.baths)
+            BEGIN
+                INSERT INTO rent_history (rental_id, rent_eur, previous_rent_eur, original_rent, rent_period,
+                                          summary, beds, baths)
+                VALUES (NEW.id, NEW.rent_eur, OLD.rent_eur, NEW.original_rent, NEW.rent_period,
+                        NEW.summary, NEW.beds, NEW.baths);
+            END
+        ''')
+
+        if backfill:
+            # Listings stored before the history existed start from their last known state
+            self.cursor.execute('''
+                INSERT INTO rent_history (rental_id, observed_at, rent_eur, original_rent, rent_period,
+                                          summary, beds, baths)
+                SELECT id, updated_at, rent_eur, original_rent, rent_period, summary, beds, baths
+                FROM rentals
+            ''')
+
+    # One statement for new and existing URLs. Existing rows are only rewritten
+    # when a field differs, so updated_at marks real changes (detail-page
+    # enrichment re-runs for those). A card without furnishing info ("Unknown")
+    # keeps the status found on the detail page.
+    UPSERT_SQL = '''
+        INSERT INTO rentals
+        (source, address, url, rent_eur, rent_period, original_rent,
+         summary, beds, baths, furnished)
+        VALUES (:source, :address, :url, :rent_eur, :rent_period, :original_rent,
+                :summary, :beds, :baths, :furnished)
+        ON CONFLICT(url) DO UPDATE SET
+            source = excluded.source, address = excluded.address, rent_eur = excluded.rent_eur,
+            rent_period = excluded.rent_period, original_rent = excluded.original_rent,
+            summary = excluded.summary, beds = excluded.beds, baths = excluded.baths,
+            furnished = CASE WHEN excluded.furnished = 'Unknown' THEN rentals.furnished ELSE excluded.furnished END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE rentals.source IS NOT excluded.source OR rentals.address IS NOT excluded.address
+           OR rentals.rent_eur IS NOT excluded.rent_eur OR rentals.rent_period IS NOT excluded.rent_period
+           OR rentals.original_rent IS NOT excluded.original_rent OR rentals.summary IS NOT excluded.summary
+           OR rentals.beds IS NOT excluded.beds OR rentals.baths IS NOT excluded.baths
+           OR (rentals.furnished IS NOT excluded.furnished AND excluded.furnished IS NOT 'Unknown')
+    '''
+
+    @staticmethod
+    def _upsert_params(listing: Dict) -> Dict:
+        return {
+            'source': listing.get('source'),
+            'address': listing.get('address'),
+            'url': listing.get('url'),
+            'rent_eur': listing.get('rent_eur'),
+            'rent_period': listing.get('rent_period', 'monthly'),
+            'original_rent': listing.get('original_rent', listing.get('rent_eur')),
+            'summary': listing.get('summary'),
+            'beds': listing.get('beds'),
+            'baths': listing.get('baths'),
+            'furnished': listing.get('furnished'),
+        }
+
+    def insert_listing(self, listing: Dict) -> bool:
+        """Insert or update one listing. Returns True if it was new."""
+        inserted, _, _ = self.insert_many([listing])
+        return inserted == 1
 
     def insert_many(self, listings: List[Dict]) -> tuple:
         """
-        Insert multiple listings into the database.
+        Upsert a batch of listings in a single transaction.
 
         Returns:
-            tuple: (inserted_count, updated_count)
+            tuple: (inserted_count, updated_count, unchanged_count)
         """
-        inserted = 0
-        updated = 0
+        if not listings:
+            return 0, 0, 0
 
-        for listing in listings:
-            if self.insert_listing(listing):
-                inserted += 1
-            else:
-                updated += 1
+        with self.conn:
+            self.cursor.execute('SELECT COALESCE(MAX(id), 0) AS max_id FROM rentals')
+            max_id = self.cursor.fetchone()['max_id']
+            self.cursor.executemany(self.UPSERT_SQL, [self._upsert_params(listing) for listing in listings])
+            # rowcount sums inserts and real updates; no-op conflicts count zero
+            written = self.cursor.rowcount
+            self.cursor.execute('SELECT COUNT(*) AS inserted FROM rentals WHERE id > ?', (max_id,))
+            inserted = self.cursor.fetchone()['inserted']
 
-        return inserted, updated
+        updated = written - inserted
+        return inserted, updated, len(listings) - written
 
     def get_all_listings(self) -> List[Dict]:
         """Retrieve all listings from the database"""
@@ -150,10 +535,181 @@ class RentalDatabase:
         rows = self.cursor.fetchall()
         return [dict(row) for row in rows]
 
+    def search(self, **filters) -> Dict:
+        """Indexed listing search; see search_listings() for the filters and paging"""
+        return search_listings(self.conn, **filters)
+
+    def keyword_search(self, text: str, limit: int = 50) -> List[Dict]:
+        """
+        Listings matching every word of `text` (as prefixes) in address or
+        summary, best match first. BM25 ranking weights address hits double.
+        """
+        match = fts_query(text)
+        if match is None:
+            return []
+        self.cursor.execute(f"""
+            SELECT {SEARCH_COLUMNS}, matches.rank
+            FROM (
+                SELECT rowid AS rental_id, bm25(rentals_fts, 2.0, 1.0) AS rank
+                FROM rentals_fts
+                WHERE rentals_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            ) AS matches
+            JOIN rentals ON rentals.id = matches.rental_id
+            ORDER BY matches.rank
+        """, (match, limit))
+        return [dict(row) for row in self.cursor.fetchall()]
+
+    def get_rent_history(self, url: str) -> List[Dict]:
+        """Every recorded observation of a listing, oldest first"""
+        self.cursor.execute('''
+            SELECT h.observed_at, h.rent_eur, h.previous_rent_eur, h.original_rent, h.rent_period,
+                   h.summary, h.beds, h.baths
+            FROM rent_history h
+            JOIN rentals r ON r.id = h.rental_id
+            WHERE r.url = ?
+            ORDER BY h.observed_at, h.id
+        ''', (url,))
+        return [dict(row) for row in self.cursor.fetchall()]
+
+    def get_price_drops(self, days: int = 7) -> List[Dict]:
+        """Listings whose rent went down in the last `days` days, biggest drop first"""
+        self.cursor.execute('''
+            SELECT r.source, r.address, r.url, h.observed_at, h.previous_rent_eur, h.rent_eur,
+                   h.previous_rent_eur - h.rent_eur AS drop_eur
+            FROM rent_history h
+            JOIN rentals r ON r.id = h.rental_id
+            WHERE h.rent_eur < h.previous_rent_eur
+              AND h.observed_at >= datetime('now', ?)
+            ORDER BY drop_eur DESC
+        ''', (f'-{int(days)} days',))
+        return [dict(row) for row in self.cursor.fetchall()]
+
+    def get_listing_fingerprints(self, source: str) -> Dict[str, tuple]:
+        """
+        Map every known URL of a source to its stored fields, for incremental crawls.
+
+        Tuple order matches incremental.FINGERPRINT_FIELDS:
+        (address, rent_eur, summary, beds, baths, furnished)
+        """
+        self.cursor.execute('''
+            SELECT url, address, rent_eur, summary, beds, baths, furnished
+            FROM rentals
+            WHERE source = ?
+        ''', (source,))
+
+        return {row['url']: tuple(row)[1:] for row in self.cursor.fetchall()}
+
+    def update_normalized_fields(self, rows: List[Dict]) -> int:
+        """
+        Write re-normalized rent_eur, beds, baths and furnished back by URL in
+        one transaction. This corrects stored values rather than observing new
+        ones, so updated_at is left alone: the rent history does not record it
+        and detail-page enrichment does not re-run for it.
+        """
+        self.cursor.executemany('''
+            UPDATE rentals
+            SET rent_eur = ?, beds = ?, baths = ?, furnished = ?
+            WHERE url = ?
+        ''', [
+            (row['rent_eur'], row['beds'], row['baths'], row['furnished'], row['url'])
+            for row in rows
+        ])
+        self.conn.commit()
+        return len(rows)
+
+    def update_canonical_ids(self, ids: Dict[int, int]) -> int:
+        """Set canonical_id for rentals rows (row id -> canonical id), skipping rows already up to date"""
+        self.cursor.executemany('''
+            UPDATE rentals SET canonical_id = ?
+            WHERE id = ? AND canonical_id IS NOT ?
+        ''', [(canonical_id, row_id, canonical_id) for row_id, canonical_id in ids.items()])
+        changed = self.cursor.rowcount
+        self.conn.commit()
+        return changed
+
+    def get_listings_to_enrich(self, limit: int = None) -> List[Dict]:
+        """Listings never enriched, or changed since their detail page was last read"""
+        self.cursor.execute('''
+            SELECT source, url
+            FROM rentals
+            WHERE enriched_at IS NULL OR updated_at > enriched_at
+            ORDER BY updated_at DESC
+            LIMIT ?
+        ''', (limit if limit is not None else -1,))
+        return [dict(row) for row in self.cursor.fetchall()]
+
+    def save_enrichment(self, rows: List[Dict]) -> int:
+        """
+        Store detail-page fields by URL in one transaction. Furnished status
+        only replaces "Unknown"; updated_at is left alone so enriching does
+        not count as a change.
+        """
+        self.cursor.executemany('''
+            UPDATE rentals
+            SET floor_area_sqm = COALESCE(:floor_area_sqm, floor_area_sqm),
+                ber = COALESCE(:ber, ber),
+                description = COALESCE(:description, description),
+                furnished = CASE WHEN furnished = 'Unknown' AND :furnished IS NOT NULL
+                                 THEN :furnished ELSE furnished END,
+                enriched_at = CURRENT_TIMESTAMP
+            WHERE url = :url
+        ''', [
+            {field: row.get(field) for field in ('floor_area_sqm', 'ber', 'description', 'furnished', 'url')}
+            for row in rows
+        ])
+        self.conn.commit()
+        return len(rows)
+
+    def save_checkpoint(self, source: str, state: Dict, urls: List[str] = ()):
+        """Record crawl progress for a source along with the listing URLs just saved"""
+        self.cursor.execute('''
+            INSERT INTO crawl_checkpoints (source, next_page, last_page, frontier, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(source) DO UPDATE SET
+                next_page = excluded.next_page,
+                last_page = excluded.last_page,
+                frontier = excluded.frontier,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (source, state['next_page'], state.get('last_page'), json.dumps(state.get('frontier') or [])))
+        self.cursor.executemany(
+            'INSERT OR IGNORE INTO crawl_seen_urls (source, url) VALUES (?, ?)',
+            [(source, url) for url in urls]
+        )
+        self.conn.commit()
+
+    def load_checkpoint(self, source: str) -> Optional[Dict]:
+        """Saved progress of an unfinished crawl of `source`, or None"""
+        self.cursor.execute('''
+            SELECT next_page, last_page, frontier, updated_at
+            FROM crawl_checkpoints
+            WHERE source = ?
+        ''', (source,))
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+
+        checkpoint = dict(row)
+        checkpoint['frontier'] = json.loads(row['frontier'] or '[]')
+        self.cursor.execute('SELECT url FROM crawl_seen_urls WHERE source = ?', (source,))
+        checkpoint['seen_urls'] = {r['url'] for r in self.cursor.fetchall()}
+        return checkpoint
+
+    def clear_checkpoint(self, source: str):
+        self.cursor.execute('DELETE FROM crawl_checkpoints WHERE source = ?', (source,))
+        self.cursor.execute('DELETE FROM crawl_seen_urls WHERE source = ?', (source,))
+        self.conn.commit()
+
     def get_stats(self) -> Dict:
         """Get database statistics"""
-        self.cursor.execute('SELECT COUNT(*) as total FROM rentals')
-        total = self.cursor.fetchone()['total']
+        # Cross-source duplicates share a canonical_id; rows not yet resolved count as unique
+        self.cursor.execute('''
+            SELECT COUNT(*) as total, COUNT(DISTINCT COALESCE(canonical_id, id)) as unique_total
+            FROM rentals
+        ''')
+        totals = self.cursor.fetchone()
+        total, unique_total = totals['total'], totals['unique_total']
 
         self.cursor.execute('''
             SELECT source, COUNT(*) as count
@@ -172,6 +728,7 @@ class RentalDatabase:
 
         return {
             'total': total,
+            'unique': unique_total,
             'by_source': by_source,
             'weekly_converted': periods['weekly_count'],
             'monthly_original': periods['monthly_count']
@@ -179,13 +736,18 @@ class RentalDatabase:
 
     def clear_all(self):
         """Clear all listings from the database"""
+        self.cursor.execute('DELETE FROM rent_history')
         self.cursor.execute('DELETE FROM rentals')
         self.conn.commit()
 
     def close(self):
         """Close database connection"""
         if self.conn:
+            # Refresh planner statistics for tables that changed a lot (cheap when nothing did)
+            self.conn.execute('PRAGMA optimize')
             self.conn.close()
+            self.conn = None
+            self.cursor = None
 
     def __enter__(self):
         return self
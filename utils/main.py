@@ -1,7 +1,14 @@
 
+import argparse
 import csv
 import os
+import queue
 import sys
+import threading
+import time
+import pandas as pd
+import yaml
+from concurrent.futures import ThreadPoolExecutor
 
 # Add scrapers directory to path for imports
 house_scrapers_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scrapers", "house scrappers")
@@ -9,40 +16,224 @@ sys.path.insert(0, house_scrapers_path)
 
 from property_ie_scrapper import PropertyIEScraper
 from homes_ie_scrapper import MyHomeIEScraper
+from driver_pool import DriverPool
+from crawl_engine import CrawlEngine
+from page_cache import PageCache
+from page_archive import PageArchive
+from crawl_metrics import CrawlMetrics, TIMINGS
+from normalize import LISTING_FIELDS, renormalize_frame, to_records
+from dedup import resolve_canonical_ids
+from enrichment import DetailEnricher
 
 # Import database module
 utils_path = os.path.dirname(__file__)
 sys.path.insert(0, utils_path)
 from database import RentalDatabase
 
-def run_scraper(scraper_class, filename, db):
-    """Run a single scraper and save to database and CSV"""
-    scraper = scraper_class()
-    listings = scraper.run()
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, "config.yaml")
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+COMBINED_CSV = "dublin_all_sources.csv"
 
-    print(f"\nSCRAPING COMPLETE: {len(listings)} listings from {scraper_class.__name__}")
+def load_config() -> dict:
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
 
-    if listings:
-        # Save to database
-        inserted, updated = db.insert_many(listings)
-        print(f"DATABASE: {inserted} inserted, {updated} updated")
+def build_page_cache(config: dict):
+    """PageCache from the page_cache section of config.yaml, or None if disabled"""
+    cache_config = config.get("page_cache") or {}
+    if not cache_config.get("enabled", False):
+        return None
+    cache_dir = os.path.join(PROJECT_ROOT, cache_config.get("dir", "data/page_cache"))
+    return PageCache(cache_dir, ttl=cache_config.get("ttl", 21600), max_mb=cache_config.get("max_mb", 500))
 
-        # Also save to CSV for backup
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+def stream_source(scraper_class, known_listings=None, checkpoint=None, **resources):
+    """
+    Run a single scraper, yielding (batch, progress) page by page (no database access).
+
+    progress is the crawl checkpoint after that page; a final (None, progress)
+    marks the end of the crawl. resources are the shared driver_pool,
+    crawl_engine, page_cache and archive.
+    """
+    scraper = scraper_class(CONFIG_PATH, known_listings=known_listings, checkpoint=checkpoint, **resources)
+    for batch in scraper.stream():
+        yield batch, scraper.progress.snapshot()
+    yield None, scraper.progress.snapshot()
+
+def source_inputs(db, scraper_class, incremental=False, resume=False):
+    """Known listings and the checkpoint to resume from for one source (read on the database thread)"""
+    known_listings = db.get_listing_fingerprints(scraper_class.SOURCE) if incremental else None
+    checkpoint = db.load_checkpoint(scraper_class.SOURCE) if resume else None
+    if checkpoint:
+        print(f"[RESUME] {scraper_class.SOURCE}: checkpoint from {checkpoint['updated_at']} "
+              f"at page {checkpoint['next_page']}, {len(checkpoint['seen_urls'])} listings already saved")
+    else:
+        db.clear_checkpoint(scraper_class.SOURCE)
+    return known_listings, checkpoint
+
+def save_progress(db, scraper_class, state, batch=None):
+    """Checkpoint a source after its batch is saved; a finished crawl clears its checkpoint"""
+    if batch is None and state["complete"]:
+        db.clear_checkpoint(scraper_class.SOURCE)
+        return
+    db.save_checkpoint(scraper_class.SOURCE, state, [listing["url"] for listing in batch or ()])
+    if batch is None:
+        print(f"[CHECKPOINT] {scraper_class.SOURCE} stopped before the last page (next page {state['next_page']}). "
+              f"Run with --resume to continue.")
+
+class CsvExporter:
+    """CSV backups written batch by batch and flushed, so a crash keeps every page already scraped"""
+
+    def __init__(self, data_dir: str = DATA_DIR, append=()):
+        self.data_dir = data_dir
+        self.append = set(append)  # files of resumed crawls are added to, not replaced
+        self.files = {}
+        self.writers = {}
+        self.counts = {}
         os.makedirs(data_dir, exist_ok=True)
-        filepath = os.path.join(data_dir, filename)
 
-        keys = listings[0].keys()
-        with open(filepath, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
+    def path(self, filename: str) -> str:
+        return os.path.join(self.data_dir, filename)
+
+    def _open(self, filename: str):
+        path = self.path(filename)
+        append = filename in self.append
+        has_rows = append and os.path.exists(path) and os.path.getsize(path) > 0
+        f = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        writer = csv.DictWriter(f, fieldnames=LISTING_FIELDS, extrasaction="ignore")
+        if not has_rows:
             writer.writeheader()
-            writer.writerows(listings)
-        print(f"CSV BACKUP SAVED TO: {filepath}")
+        self.files[filename], self.writers[filename], self.counts[filename] = f, writer, 0
+
+    def seed(self, filename: str, sources):
+        """Start `filename` with the rows already saved in the `sources` files (call before any write)"""
+        self._open(filename)
+        for source in sources:
+            path = self.path(source)
+            if not os.path.exists(path):
+                continue
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            self.writers[filename].writerows(rows)
+            self.counts[filename] += len(rows)
+        self.files[filename].flush()
+
+    def write(self, filename: str, batch):
+        if filename not in self.writers:
+            self._open(filename)
+        self.writers[filename].writerows(batch)
+        self.files[filename].flush()
+        self.counts[filename] += len(batch)
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+        self.writers = {}
+
+def print_metrics_summary(metrics):
+    """p50 / p95 of each page's seconds and sizes, per source"""
+    summary = metrics.summary()
+    if not summary:
+        return
+    print(f"\n{'='*100}")
+    print("CRAWL METRICS (p50 / p95 per page)")
+    print(f"{'='*100}")
+    print(f"{'source':<14}{'pages':>6}{'failed':>7}{'cached':>7}"
+          + "".join(f"{field:>15}" for field in TIMINGS) + f"{'KB':>13}{'cards':>11}")
+    for source, stats in summary.items():
+        row = f"{source:<14}{stats['pages']:>6}{stats['failures']:>7}{stats['cached']:>7}"
+        row += "".join(f"{stats[field][0]:>7.2f}/{stats[field][1]:<7.2f}" for field in TIMINGS)
+        row += f"{stats['bytes'][0] / 1024:>6.0f}/{stats['bytes'][1] / 1024:<6.0f}"
+        row += f"{stats['cards'][0]:>5.0f}/{stats['cards'][1]:<5.0f}"
+        print(row)
+    if metrics.path:
+        print(f"\nPer-page records: {metrics.path}")
+
+def save_batch(batch, db, exporter, *filenames):
+    """Save one page of listings to database and each of the CSV files"""
+    if not batch:
+        return 0, 0, 0
+    counts = db.insert_many(batch)
+    for filename in filenames:
+        exporter.write(filename, batch)
+    return counts
+
+def stream_sequential(scrapers, inputs, resources):
+    """
+    Yield (scraper_class, batch, error, progress) from one source after another.
+
+    batch None marks the end of a source, with error set if it failed.
+    """
+    for scraper_class, _ in scrapers:
+        print(f"\n{'='*100}")
+        print(f"Starting {scraper_class.__name__}...")
+        print(f"{'='*100}")
+        known_listings, checkpoint = inputs[scraper_class]
+        try:
+            for batch, state in stream_source(scraper_class, known_listings, checkpoint, **resources):
+                yield scraper_class, batch, None, state
+        except Exception as e:
+            yield scraper_class, None, e, None
+
+def stream_parallel(scrapers, inputs, resources):
+    """
+    Run each source on its own thread, yielding (scraper_class, batch, error, progress) as pages finish.
+
+    Batches pass through a bounded queue, so a slow database writer holds the
+    scrapers back instead of letting pages pile up in memory.
+    """
+    events = queue.Queue(maxsize=16)
+    stop = threading.Event()
 
-    return listings
+    def worker(scraper_class, known_listings, checkpoint):
+        try:
+            for batch, state in stream_source(scraper_class, known_listings, checkpoint, **resources):
+                if stop.is_set():
+                    return
+                events.put((scraper_class, batch, None, state))
+        except Exception as e:
+            events.put((scraper_class, None, e, None))
 
-def run_all_scrapers():
-    """Run all house scrapers and save to SQLite database"""
+    with ThreadPoolExecutor(max_workers=len(scrapers)) as executor:
+        futures = []
+        for scraper_class, _ in scrapers:
+            futures.append(executor.submit(worker, scraper_class, *inputs[scraper_class]))
+
+        try:
+            remaining = len(scrapers)
+            while remaining:
+                event = events.get()
+                if event[1] is None:
+                    remaining -= 1
+                yield event
+        finally:
+            # If the writer stopped early, unblock workers waiting on a full queue so they can exit
+            stop.set()
+            for future in futures:
+                while not future.done():
+                    try:
+                        events.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+
+def run_all_scrapers(parallel: bool = True, incremental: bool = False, use_cache: bool = True, record: bool = False,
+                     resume: bool = False):
+    """
+    Run all house scrapers and save to SQLite database.
+
+    Scrapers yield one batch per search page, which is written to the database
+    and CSV backups straight away, so memory stays flat and a crash keeps every
+    page saved so far.
+    With parallel=True each source is scraped in its own worker thread while
+    this thread stays the only database writer.
+    With incremental=True scrapers only return new or changed listings and stop
+    paging once they reach listings already in the database.
+    With use_cache=True search pages are served from the on-disk page cache when fresh.
+    With record=True raw search pages are archived for utils/replay.py.
+    Progress is checkpointed in the database after every saved page; with
+    resume=True each source continues from its last checkpoint instead of page 1.
+    """
     print("=" * 100)
     print("RUNNING ALL HOUSE SCRAPERS")
     print("=" * 100)
@@ -51,60 +242,178 @@ def run_all_scrapers():
     db = RentalDatabase()
     print(f"Database initialized at: {db.db_path}")
 
-    all_listings = []
+    # Closed in the finally below, whatever stops the run (a scraper, the writer, Ctrl+C)
+    driver_pool = archive = metrics = None
+    try:
+        # One warm browser pool shared by every scraper
+        config = load_config()
+        driver_pool = DriverPool(**config.get("driver_pool", {}))
+        crawl_engine = CrawlEngine.from_config(config)
+        page_cache = build_page_cache(config) if use_cache else None
+        if record:
+            archive_dir = os.path.join(PROJECT_ROOT, (config.get("archive") or {}).get("dir", "data/archive"))
+            archive = PageArchive(archive_dir)
+            print(f"Recording raw pages to: {archive_dir}")
+        metrics_dir = os.path.join(PROJECT_ROOT, (config.get("metrics") or {}).get("dir", "data/metrics"))
+        metrics = CrawlMetrics(os.path.join(metrics_dir, time.strftime("%Y%m%d-%H%M%S") + ".jsonl"))
 
-    # Run each scraper
-    scrapers = [
-        (PropertyIEScraper, "dublin_property_ie.csv"),
-        (MyHomeIEScraper, "dublin_myhome_ie.csv"),
-    ]
+        # Run each scraper
+        scrapers = [
+            (PropertyIEScraper, "dublin_property_ie.csv"),
+            (MyHomeIEScraper, "dublin_myhome_ie.csv"),
+        ]
+        filenames = dict(scrapers)
+        totals = {scraper_class: [0, 0, 0, 0] for scraper_class, _ in scrapers}  # listings, inserted, updated, unchanged
 
-    for scraper_class, filename in scrapers:
-        print(f"\n{'='*100}")
-        print(f"Starting {scraper_class.__name__}...")
-        print(f"{'='*100}")
+        resources = dict(driver_pool=driver_pool, crawl_engine=crawl_engine, page_cache=page_cache, archive=archive,
+                         metrics=metrics)
+        # Read up front on this thread: the sqlite connection belongs to it
+        inputs = {scraper_class: source_inputs(db, scraper_class, incremental, resume) for scraper_class, _ in scrapers}
+        resumed = [filenames[scraper_class] for scraper_class, (_, checkpoint) in inputs.items() if checkpoint]
+
+        if parallel:
+            print(f"\nStarting {', '.join(cls.__name__ for cls, _ in scrapers)} in parallel...")
+            events = stream_parallel(scrapers, inputs, resources)
+        else:
+            events = stream_sequential(scrapers, inputs, resources)
+
+        exporter = CsvExporter(append=resumed)
+        if resumed:
+            # The combined CSV is rebuilt every run: resumed sources carry over the pages saved
+            # before the interruption, sources that restart at page 1 are written again from scratch
+            exporter.seed(COMBINED_CSV, resumed)
+        try:
+            for scraper_class, batch, error, state in events:
+                total = totals[scraper_class]
+                if error is not None:
+                    print(f"[ERROR] {scraper_class.__name__} failed: {error} "
+                          f"({total[0]} listings saved before the failure; run with --resume to continue)")
+                elif batch is None:
+                    save_progress(db, scraper_class, state)
+                    print(f"\nSCRAPING COMPLETE: {total[0]} listings from {scraper_class.__name__}")
+                    print(f"DATABASE: {total[1]} inserted, {total[2]} updated, {total[3]} unchanged")
+                    if total[0]:
+                        print(f"CSV BACKUP SAVED TO: {exporter.path(filenames[scraper_class])}")
+                else:
+                    counts = save_batch(batch, db, exporter, filenames[scraper_class], COMBINED_CSV)
+                    save_progress(db, scraper_class, state, batch)
+                    total[0] += len(batch)
+                    for i, count in enumerate(counts, 1):
+                        total[i] += count
+        finally:
+            # Stops the scraper threads (and their browsers) if the writer failed
+            events.close()
+            exporter.close()
 
-        listings = run_scraper(scraper_class, filename, db)
-        if listings:
-            all_listings.extend(listings)
+        # Combined CSV for backward compatibility, written alongside the per-source files
+        if exporter.counts.get(COMBINED_CSV):
+            print(f"\nCOMBINED CSV BACKUP:")
+            print(f"  Total listings: {exporter.counts[COMBINED_CSV]}")
+            print(f"  Saved to: {exporter.path(COMBINED_CSV)}")
 
-    # Create combined CSV for backward compatibility
-    if all_listings:
+        if (config.get("enrichment") or {}).get("enabled", False):
+            enrich_listings(db, config, crawl_engine, page_cache)
+        resolve_duplicates(db)
+
+        # Print database statistics
         print(f"\n{'='*100}")
-        print("CREATING COMBINED DATASET")
+        print("DATABASE STATISTICS")
         print(f"{'='*100}")
+        stats = db.get_stats()
+        print(f"Total listings in database: {stats['total']} ({stats['unique']} unique across sources)")
+        print(f"\nBreakdown by source:")
+        for source, count in stats['by_source'].items():
+            print(f"  - {source}: {count} listings")
+        print(f"\nRent period breakdown:")
+        print(f"  - Weekly (converted to monthly): {stats['weekly_converted']}")
+        print(f"  - Originally monthly: {stats['monthly_original']}")
 
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-        combined_filepath = os.path.join(data_dir, "dublin_all_sources.csv")
-
-        # Use consistent field order
-        fieldnames = ["source", "address", "url", "rent_eur", "rent_period", "original_rent", "summary", "beds", "baths", "furnished"]
+        print_metrics_summary(metrics)
+    finally:
+        if metrics is not None:
+            metrics.close()
+        if archive is not None:
+            archive.close()
+        if driver_pool is not None:
+            driver_pool.close()
+        db.close()
 
-        with open(combined_filepath, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_listings)
+def renormalize_database():
+    """Re-run the normalization stage over every stored listing and save the rows that change"""
+    db = RentalDatabase()
+    start = time.perf_counter()
+    rentals = pd.read_sql_query('''
+        SELECT url, rent_eur, rent_period, original_rent, summary, beds, baths, furnished
+        FROM rentals
+    ''', db.conn)
+    changed = renormalize_frame(rentals)
+    updated = db.update_normalized_fields(to_records(changed))
+    print(f"RENORMALIZED: {len(rentals)} listings checked, {updated} updated "
+          f"in {time.perf_counter() - start:.2f}s")
+    db.close()
 
-        print(f"\nCOMBINED CSV BACKUP:")
-        print(f"  Total listings: {len(all_listings)}")
-        print(f"  Saved to: {combined_filepath}")
+def enrich_listings(db, config, crawl_engine=None, page_cache=None):
+    """Fetch detail pages for listings that are new or changed since they were last enriched"""
+    enrichment_config = config.get("enrichment") or {}
+    pending = db.get_listings_to_enrich(enrichment_config.get("limit", 200))
+    if not pending:
+        print("ENRICHED: no new or changed listings")
+        return
 
-    # Print database statistics
-    print(f"\n{'='*100}")
-    print("DATABASE STATISTICS")
-    print(f"{'='*100}")
-    stats = db.get_stats()
-    print(f"Total listings in database: {stats['total']}")
-    print(f"\nBreakdown by source:")
-    for source, count in stats['by_source'].items():
-        print(f"  - {source}: {count} listings")
-    print(f"\nRent period breakdown:")
-    print(f"  - Weekly (converted to monthly): {stats['weekly_converted']}")
-    print(f"  - Originally monthly: {stats['monthly_original']}")
+    start = time.perf_counter()
+    print(f"\nEnriching {len(pending)} new or changed listings from their detail pages...")
+    enricher = DetailEnricher(config, crawl_engine, page_cache, concurrency=enrichment_config.get("concurrency", 4))
+    try:
+        details = enricher.enrich(pending)
+    finally:
+        enricher.close()
+    db.save_enrichment(details)
+    print(f"ENRICHED: {len(details)} of {len(pending)} listings "
+          f"({len(pending) - len(details)} failed, retried next run) in {time.perf_counter() - start:.2f}s")
 
-    db.close()
+def resolve_duplicates(db):
+    """Cluster listings of the same flat across sources and store each row's canonical_id"""
+    start = time.perf_counter()
+    rentals = pd.read_sql_query('SELECT id, source, address, rent_eur, beds FROM rentals', db.conn)
+    canonical, stats = resolve_canonical_ids(rentals)
+    updated = db.update_canonical_ids(dict(zip(rentals['id'].tolist(), canonical.tolist())))
+    print(f"DEDUPLICATED: {stats['listings']} listings, {stats['candidates']} candidate pairs, "
+          f"{stats['matches']} matches -> {stats['unique']} unique ({updated} rows updated) "
+          f"in {time.perf_counter() - start:.2f}s")
 
 if __name__ == "__main__":
-    run_all_scrapers()
+    parser = argparse.ArgumentParser(description="Run all house scrapers")
+    parser.add_argument("--sequential", action="store_true", help="scrape one source at a time")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only collect new/changed listings, stopping once pages hold nothing new")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the on-disk page cache")
+    parser.add_argument("--record", action="store_true", help="archive raw search pages for utils/replay.py")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue each source from its last checkpoint instead of page 1")
+    parser.add_argument("--renormalize", action="store_true",
+                        help="re-derive rent, beds, baths and furnished for the stored rentals table and exit")
+    parser.add_argument("--enrich", action="store_true",
+                        help="fetch detail pages for new or changed listings only and exit")
+    parser.add_argument("--dedup", action="store_true",
+                        help="re-match the same listing across sources, update canonical ids and exit")
+    args = parser.parse_args()
+
+    if args.renormalize:
+        renormalize_database()
+        sys.exit(0)
+
+    if args.enrich:
+        config = load_config()
+        with RentalDatabase() as db:
+            enrich_listings(db, config, page_cache=None if args.no_cache else build_page_cache(config))
+        sys.exit(0)
+
+    if args.dedup:
+        with RentalDatabase() as db:
+            resolve_duplicates(db)
+        sys.exit(0)
+
+    run_all_scrapers(parallel=not args.sequential, incremental=args.incremental,
+                     use_cache=not args.no_cache, record=args.record, resume=args.resume)
 
     # Job scrapers (to be added later)
\ No newline at end of file
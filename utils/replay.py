@@ -0,0 +1,94 @@
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+# Add scrapers directory to path for imports
+house_scrapers_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scrapers", "house scrappers")
+sys.path.insert(0, house_scrapers_path)
+
+from property_ie_scrapper import PropertyIEScraper
+from homes_ie_scrapper import MyHomeIEScraper
+from daft_ie_scrapper import DaftIEScraper
+from page_archive import iter_archive
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(PROJECT_ROOT, "config.yaml")
+DEFAULT_ARCHIVE_DIR = os.path.join(PROJECT_ROOT, "data", "archive")
+
+PARSERS = {
+    cls.SOURCE: cls for cls in (PropertyIEScraper, MyHomeIEScraper, DaftIEScraper)
+}
+
+
+def replay_listings(archive_dir: str = DEFAULT_ARCHIVE_DIR, source: str = None):
+    """Run the current parsers over archived pages, yielding (record, listings) per page"""
+    parsers = {}
+    for record in iter_archive(archive_dir, source):
+        if record["source"] not in PARSERS:
+            continue
+        if record["source"] not in parsers:
+            # Parsers only: no browser, crawl engine or parse pool is set up
+            parsers[record["source"]] = PARSERS[record["source"]](CONFIG_PATH, parse_only=True)
+        _, listings = parsers[record["source"]].parse_html(record["html"])
+        yield record, listings
+
+
+def benchmark(archive_dir: str = DEFAULT_ARCHIVE_DIR, source: str = None, repeat: int = 3) -> dict:
+    """
+    Time each parser over every archived page.
+
+    Returns per-source stats: pages, cards, parsed, seconds (best of `repeat`),
+    cards_per_sec and failure_rate (cards that produced no listing).
+    """
+    pages_by_source = defaultdict(list)
+    for record in iter_archive(archive_dir, source):
+        if record["source"] in PARSERS:
+            pages_by_source[record["source"]].append(record["html"])
+
+    results = {}
+    for src, pages in pages_by_source.items():
+        parser = PARSERS[src](CONFIG_PATH, parse_only=True)
+        best = None
+        cards = parsed = 0
+        for _ in range(repeat):
+            cards = parsed = 0
+            start = time.perf_counter()
+            for html in pages:
+                found, listings = parser.parse_html(html)
+                cards += found
+                parsed += len(listings)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        results[src] = {
+            "pages": len(pages),
+            "cards": cards,
+            "parsed": parsed,
+            "seconds": best,
+            "cards_per_sec": cards / best if best else 0.0,
+            "failure_rate": (cards - parsed) / cards if cards else 0.0,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay archived search pages through the parsers")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_DIR, help="archive directory")
+    parser.add_argument("--source", help="only replay one source, e.g. property.ie")
+    parser.add_argument("--repeat", type=int, default=3, help="benchmark repetitions (best is reported)")
+    args = parser.parse_args()
+
+    stats = benchmark(args.archive, args.source, args.repeat)
+    if not stats:
+        print(f"No archived pages found in {args.archive}. Record some with: python utils/main.py --record")
+        sys.exit(1)
+
+    print("=" * 100)
+    print("PARSER BENCHMARK")
+    print("=" * 100)
+    print(f"{'source':<14}{'pages':>8}{'cards':>10}{'parsed':>10}{'seconds':>10}{'cards/s':>12}{'fail %':>9}")
+    for src, s in stats.items():
+        print(f"{src:<14}{s['pages']:>8}{s['cards']:>10}{s['parsed']:>10}{s['seconds']:>10.3f}"
+              f"{s['cards_per_sec']:>12.0f}{s['failure_rate'] * 100:>8.1f}%")